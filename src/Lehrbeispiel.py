@@ -23,15 +23,29 @@ Optional:
 # Default logger of oemof
 import oemof.solph as solph
 from oemof.solph import helpers
-from oemof.tools import logger
-import oemof.tools.economics as economics
 
 import pyomo.environ as po
 
 import logging
 import os
+import threading
 import pandas as pd
-import yaml
+
+from Lehrbeispiel_Daten import (abs_path, load_config, load_time_series,
+                                load_parameters, apply_overrides)
+from Lehrbeispiel_Aggregation import typische_perioden
+from Lehrbeispiel_Modell import (signatur, parametrisiere, aktualisiere,
+                                 investitionsgroessen)
+from Lehrbeispiel_Horizont import rollierender_horizont
+from Lehrbeispiel_Ergebnisse import (flussmatrix_aus_modell,
+                                     schattenpreise_aus_modell)
+import Lehrbeispiel_Ablage as ablage
+from Lehrbeispiel_Inkrementell import (modell_schluessel,
+                                       gespeicherte_ergebnisse)
+from Lehrbeispiel_Solver import solve
+from Lehrbeispiel_Technologien import tabelle
+from Lehrbeispiel_Komponenten import lade_vorlage, baue
+import Lehrbeispiel_Profil as profil
 
 
 try:
@@ -39,265 +53,173 @@ try:
 except ImportError:
     plt = None
 
-def run_model(config_path, team_number):
+# Laufende Hintergrund-Threads zum Speichern der .oemof-Dateien
+_dump_threads = []
 
-    with open(config_path, 'r') as ymlfile:
-        cfg = yaml.load(ymlfile, Loader=yaml.CLoader)
+# Wiederverwendbare Modelle {Struktursignatur: (energysystem, model,
+# aggregation)}, siehe reuse_model in config.yaml
+_models = {}
 
-    if cfg['debug']:
-        number_of_time_steps = 3
-    else:
-        number_of_time_steps = 8760
 
-    solver = cfg['solver']
-    debug = cfg['debug']
-    periods = number_of_time_steps
-    solver_verbose = cfg['solver_verbose']  # show/hide solver output
-
-    logger.define_logging(logfile='model_team_{0}.log'.format(team_number+1),
-                          screen_level=logging.INFO,
-                          file_level=logging.DEBUG)
+def create_model(param_value, data, model_time_index, aggregation=None):
+    """Create the energy system of one team and the optimisation model.
 
+    `data` holds the time series at the time steps of `model_time_index`
+    (typical periods if `aggregation` is given). Returns the energy system
+    and the `solph.Model`.
+    """
 
     logging.info('Initialize the energy system')
-    date_time_index = pd.date_range('1/1/2019', periods=number_of_time_steps,
-                                freq='H')
-
-    energysystem = solph.EnergySystem(timeindex=date_time_index)
+    energysystem = solph.EnergySystem(timeindex=model_time_index)
     
 #    timestr = time.strftime("%Y%m%d")
     
     
-    ##########################################################################
-    # Einlesen der Zeitreihen und Variablen aus den Dateien
-    ##########################################################################
-
-    abs_path = os.path.dirname(os.path.abspath(os.path.join(__file__, '..')))
-
-    file_path_ts = abs_path + '/data_raw/' + cfg[
-        'time_series_file_name']
-    data = pd.read_csv(file_path_ts, sep=';')
-
-
-    file_name_param_01 = cfg['design_parameters_file_name'][team_number]
-    file_path_param_01 = (abs_path + '/data/'
-                          + file_name_param_01)
-    param_df_01 = pd.read_csv(file_path_param_01, index_col=1,
-                              sep=';', encoding = 'unicode_escape')
-    param_value = param_df_01['value']
- 
-    
-    # periodische Kosten
-    epc_PV = economics.annuity(capex=param_value['capex_PV'],
-                               n=param_value['n_PV'],
-                               wacc=param_value['wacc'])
-    epc_Solarthermie = economics.annuity(capex=param_value['capex_Sol'],
-                                         n=param_value['n_Sol'],
-                                         wacc=param_value['wacc'])
-    epc_gas_boiler = economics.annuity(capex=param_value['capex_Gaskessel'],
-                                       n=param_value['n_Gaskessel'],
-                                       wacc=param_value['wacc'])
-    epc_BHKW = economics.annuity(capex=param_value['capex_BHKW'],
-                                 n=param_value['n_BHKW'],
-                                 wacc=param_value['wacc'])
-    epc_heat_pump = economics.annuity(capex=param_value['capex_Waermepumpe'],
-                                      n=param_value['n_Waermepumpe'],
-                                      wacc=param_value['wacc'])
-    epc_el_storage = economics.annuity(capex=param_value['capex_Stromspeicher'],
-                                       n=param_value['n_Stromspeicher'],
-                                       wacc=param_value['wacc'])
-    epc_th_storage = economics.annuity(capex=param_value['capex_Waermespeicher'],
-                                       n=param_value['n_Waermespeicher'],
-                                       wacc=param_value['wacc'])
+    # Technologietabelle mit periodischen Kosten (Lehrbeispiel_Technologien)
+    technik = tabelle(param_value)
+    profil.messpunkt('annuity')
     
     
     ##########################################################################
     # Erstellung der Oemof-Komponenten
     ##########################################################################
     
+    # Busse und Komponenten aus experiment_config/components.yaml, nicht
+    # benoetigte Technologien werden nicht angelegt
     logging.info('Create oemof objects')
-    
-    ### Definition der bus'es #################################################
-    
-    # Erdgasbus
-    b_gas = solph.Bus(label="Erdgas")
-    
-    # Strombus
-    b_el = solph.Bus(label="Strom")
-    
-    # Waermebus
-    b_th = solph.Bus(label="Waerme")
-    
-    # Hinzufügen zum Energiesystem
-    energysystem.add(b_gas, b_el, b_th)
-    
-    
-    ### Definition des Ueberschusses #########################################
-    
-    # Senke fuer Stromueberschusss
-    energysystem.add(solph.Sink(
-            label='excess_bel',
-            inputs={b_el: solph.Flow()}))
-    
-    # Senke fuer Waermeueberschuss
-    energysystem.add(solph.Sink(
-            label='excess_bth',
-            inputs={b_th: solph.Flow()}))
-    
-    
-    ### Definition Quellen #################################################
-    
-    # Quelle: Erdgasnetz
-    energysystem.add(solph.Source(
-            label='Gasnetz',
-            outputs={b_gas: solph.Flow(
-            variable_costs=param_value['vc_gas']
-                            +param_value['vc_CO2'])})) #[€/kWh]
-    
-    # Quelle: Stromnetz
-    energysystem.add(solph.Source(
-            label='Strombezug',
-            outputs={b_el: solph.Flow(
-            variable_costs=param_value['vc_el'])})) #[€/kWh]
-    
-    # Quelle: Waermenetz/Fernwaerme
-    energysystem.add(solph.Source(
-            label='Waermebezug',
-            outputs={b_th: solph.Flow(
-            variable_costs=param_value['vc_th'])})) #[€/kWh]
-    
-    # Quelle: Solaranlage
-    if param_value['A_Kollektor_gesamt'] > 0:    
-        energysystem.add(solph.Source(
-                label='PV',
-                outputs={b_el:solph.Flow(
-                        fix=(data['Sol_irradiation [Wh/sqm]']*0.001
-                                      *param_value['cf_PV']),         #[kWh/m²]
-                        investment=solph.Investment(
-                        ep_costs=epc_PV,
-                        minimum=param_value['A_min_PV']*1*param_value['cf_PV']
-                        ))}))
-                        
-    # Quelle: Solarthermieanlage
-    if param_value['A_Kollektor_gesamt'] > 0:    
-        energysystem.add(solph.Source(
-                label='Solarthermie',
-                outputs={b_th:solph.Flow(
-                        fix=(data['Sol_irradiation [Wh/sqm]']*0.001
-                                      *param_value['cf_Sol']),  #[kWh/m²]
-                        investment=solph.Investment(
-                        ep_costs=epc_Solarthermie,
-                        minimum=param_value['A_min_Sol']*1*param_value['cf_Sol']
-                        ))}))
-        
-        
-    ### Definition Bedarf ################################################
-      
-    # Strombedarf
-    energysystem.add(solph.Sink(
-            label='Strombedarf',
-            inputs={b_el: solph.Flow(
-                fix=data['P*'],
-                nominal_value=param_value['W_el'], #[kWh]
-                )}))
-     
-    # Waermebedarf
-    energysystem.add(solph.Sink(
-            label='Waermebedarf',
-            inputs={b_th: solph.Flow(
-                fix=data['Q*'],
-                nominal_value=param_value['W_th'], #[kWh]
-                )}))     
-        
-        
-    ### Definition Systemkomponenten #########################################
-    
-    # Transformer: Gaskessel
-    if param_value['max_Gaskessel'] > 0:
-        energysystem.add(solph.Transformer(
-                label="Gaskessel",
-                inputs={b_gas: solph.Flow()},
-                outputs={b_th: solph.Flow(investment=solph.Investment(
-                                  ep_costs=epc_gas_boiler,
-                                  minimum=param_value['min_Gaskessel'],    #[kW]
-                                  maximum=param_value['max_Gaskessel']))}, #[kW]
-                conversion_factors={b_th: param_value['cf_Gaskessel']}))
-    
-    # Transformer: BHKW
-    if param_value['max_BHKW'] > 0:
-        energysystem.add(solph.Transformer(
-                label="BHKW",
-                inputs={b_gas: solph.Flow()},
-                outputs={b_el: solph.Flow(),
-                         b_th:solph.Flow(investment=solph.Investment(
-                                 ep_costs=epc_BHKW,
-                                 minimum=param_value['min_BHKW'],          #[kW]
-                                 maximum=param_value['max_BHKW']))},       #[kW]
-                conversion_factors={b_el: param_value['cf_BHKW_el'],
-                                    b_th:0.85-param_value['cf_BHKW_el']}))
-    
-    # Transformer: Waermepumpe
-    if param_value['max_Waermepumpe'] > 0:
-        energysystem.add(solph.Transformer(
-                label="Waermepumpe",
-                inputs={b_el: solph.Flow()},
-                outputs={b_th: solph.Flow(investment=solph.Investment(
-                                  ep_costs=epc_heat_pump,
-                                  minimum=param_value['min_Waermepumpe'],    #[kW]
-                                  maximum=param_value['max_Waermepumpe']))}, #[kW]
-                conversion_factors={b_th: param_value['COP_Waermepumpe']}))
-    
-    # Speicher: Stromspeicher
-    if param_value['max_Stromspeicher'] > 0:
-        Stromspeicher = solph.components.GenericStorage(
-                label='Stromspeicher',
-                inputs={b_el: solph.Flow()},
-                outputs={b_el: solph.Flow()},
-                loss_rate=param_value['lr_Stromspeicher'],
-                initial_storage_level=param_value['isl_Stromspeicher'],
-                inflow_conversion_factor=param_value['cf_Stromspeicher_ein'],
-                outflow_conversion_factor=param_value['cf_Stromspeicher_aus'],
-                investment=solph.Investment(ep_costs=epc_el_storage,
-                                    minimum=param_value['min_Stromspeicher'],  #[kWh]
-                                    maximum=param_value['max_Stromspeicher'])) #[kWh]
-        energysystem.add(Stromspeicher)
-    
-    # Speicher: Waermespeicher
-    if param_value['max_Waermespeicher'] > 0:
-        Waermespeicher = solph.components.GenericStorage(
-                label='Waermespeicher',
-                inputs={b_th: solph.Flow()},
-                outputs={b_th: solph.Flow()},
-                loss_rate=param_value['lr_Waermespeicher'],
-                initial_storage_level=param_value['isl_Waermespeicher'],
-                inflow_conversion_factor=param_value['cf_Waermespeicher_ein'],
-                outflow_conversion_factor=param_value['cf_Waermespeicher_aus'],
-                investment=solph.Investment(ep_costs=epc_th_storage,
-                                    minimum=param_value['min_Waermespeicher'],  #[kWh]
-                                    maximum=param_value['max_Waermespeicher'])) #[kWh]
-        energysystem.add(Waermespeicher)
+    busse = baue(energysystem, lade_vorlage(), param_value, data, technik)
+    profil.messpunkt('components')
     
     
         
     logging.info('Optimise the energy system')
     
-    # Initialisierung des Modells
-    model = solph.Model(energysystem)
+    # Initialisierung des Modells (typische Perioden gewichtet mit der Anzahl
+    # der Perioden, fuer die sie stehen)
+    if aggregation is not None:
+        gewichtung = aggregation.objective_weighting(model_time_index)
+        model = solph.Model(energysystem, objective_weighting=gewichtung)
+        aggregation.verknuepfe_speicher(model)
+    else:
+        model = solph.Model(energysystem)
+    profil.messpunkt('model_build')
     
     
     ##########################################################################
     # Constraint fuer Kollektorgesamtflaeche
     ##########################################################################
     
-    PV_installed = energysystem.groups['PV']
-    Sol_installed = energysystem.groups['Solarthermie']
-    
-    myconstrains = po.Block()
-    model.add_component('MyBlock', myconstrains)
-    myconstrains.collector_area = po.Constraint(
-            expr=((((model.InvestmentFlow.invest[PV_installed, b_el])/(1*param_value['cf_PV']))
-            + ((model.InvestmentFlow.invest[Sol_installed, b_th])/(1*param_value['cf_Sol']))) <= param_value['A_Kollektor_gesamt']))
-        
+    # nur wenn PV und Solarthermie gebaut werden (A_Kollektor_gesamt > 0)
+    if 'PV' in energysystem.groups and 'Solarthermie' in energysystem.groups:
+        PV_installed = energysystem.groups['PV']
+        Sol_installed = energysystem.groups['Solarthermie']
+        b_el = busse['Strom']
+        b_th = busse['Waerme']
+    
+        myconstrains = po.Block()
+        model.add_component('MyBlock', myconstrains)
+        myconstrains.collector_area = po.Constraint(
+                expr=((((model.InvestmentFlow.invest[PV_installed, b_el])/(1*param_value['cf_PV']))
+                + ((model.InvestmentFlow.invest[Sol_installed, b_th])/(1*param_value['cf_Sol']))) <= param_value['A_Kollektor_gesamt']))
+    profil.messpunkt('collector_area')
+
+    return energysystem, model
+
+
+def _create(cfg, param_value, data, date_time_index):
+    """Select the typical periods (optional) and create the model."""
+    # Zeitreihenaggregation: Modell nur fuer typische Perioden aufbauen
+    aggregation = None
+    if not cfg['debug'] and cfg.get('typical_periods', 0) > 0:
+        aggregation = typische_perioden(data, len(date_time_index), cfg)
+    if aggregation is not None:
+        data = aggregation.reduziere(data)
+        profil.messpunkt('aggregation')
+        model_time_index = pd.date_range(date_time_index[0],
+                                         periods=len(aggregation),
+                                         freq=date_time_index.freq)
+    else:
+        model_time_index = date_time_index
+    energysystem, model = create_model(param_value, data, model_time_index,
+                                       aggregation)
+    return energysystem, model, aggregation
+
+
+def run_model(config_path, team_number, overrides=None):
+    """Build and solve the energy system of one team.
+
+    `overrides` ({var_name: value}) replaces single design parameters of the
+    team (parameter sweep). Results of such scenarios are not stored as
+    .oemof file, so the file of the team itself is kept.
+    """
+
+    cfg = load_config(config_path)
+    # Messung nur mit profiling, sonst kosten auch die Messpunkte nichts
+    if cfg.get('profiling', False):
+        profil.starte(team_number)
+
+    if cfg['debug']:
+        number_of_time_steps = 3
+    else:
+        number_of_time_steps = cfg.get('number_of_time_steps', 8760)
+
+    debug = cfg['debug']
+    periods = number_of_time_steps
+
+    ##########################################################################
+    # Einlesen der Zeitreihen und Variablen aus den Dateien
+    ##########################################################################
+
+    data = load_time_series(cfg)
+    param_value = apply_overrides(load_parameters(cfg, team_number),
+                                  overrides)
+    profil.messpunkt('csv')
+
+    # Inkrementeller Lauf: gespeicherte Ergebnisse bei unveraenderten
+    # Eingaben verwenden; der Inhaltsschluessel (Hash ueber Zeitreihe und
+    # Modellcode) wird nur dafuer berechnet
+    schluessel = None
+    if cfg.get('incremental', False) and not overrides and not debug:
+        schluessel = modell_schluessel(cfg, param_value)
+        results = gespeicherte_ergebnisse(team_number, schluessel)
+        if results is not None:
+            logging.info('Inputs of team {0} unchanged, use the stored '
+                         'results.'.format(team_number+1))
+            profil.messpunkt('load_results')
+            return results
+
+    date_time_index = pd.date_range(cfg.get('start_date', '1/1/2019'),
+                                    periods=number_of_time_steps,
+                                    freq=cfg.get('time_step_frequency', 'H'))
+
+    if cfg.get('rolling_horizon', False) and not debug:
+        return _run_rolling_horizon(cfg, team_number, param_value, data,
+                                    date_time_index, not overrides,
+                                    schluessel)
+
+    if cfg.get('reuse_model', False):
+        # Modell mit gleicher Struktur wiederverwenden, nur die Zahlenwerte
+        # (Kosten, Grenzen, Bedarf) werden aktualisiert
+        key = signatur(cfg, param_value, data)
+        if key in _models:
+            logging.info('Reuse the model, update the parameters')
+            wait_for_dumps()
+            energysystem, model, aggregation = _models[key]
+            if aggregation is not None:
+                aggregation.verknuepfe_speicher(model)
+        else:
+            energysystem, model, aggregation = _create(cfg, param_value, data,
+                                                       date_time_index)
+            parametrisiere(model)
+            # nur das zuletzt gebaute Modell behalten
+            _models.clear()
+            _models[key] = (energysystem, model, aggregation)
+        aenderungen = aktualisiere(model, param_value)
+        profil.messpunkt('update_model')
+    else:
+        energysystem, model, aggregation = _create(cfg, param_value, data,
+                                                   date_time_index)
+        aenderungen = None
     
     ##########################################################################
     # Optimierung des Systems und Speichern des Ergebnisses
@@ -307,18 +229,117 @@ def run_model(config_path, team_number):
             helpers.extend_basic_path('lp_files'), 'model_team_{0}.lp'.format(team_number+1))
         logging.info('Store lp-file in {0}.'.format(filename))
         model.write(filename, io_options={'symbolic_solver_labels': True})
+        profil.messpunkt('lp_write')
     
+    # Dualwerte der Nebenbedingungen vom Solver abholen (Schattenpreise)
+    if cfg.get('duals', False) and getattr(model, 'dual', None) is None:
+        # solph legt dual und rc als leere Attribute an
+        del model.dual, model.rc
+        model.receive_duals()
+    
+    if cfg.get('profiling', False):
+        profil.modellgroesse(model)
     # if tee_switch is true solver messages will be displayed
     logging.info('Solve the optimization problem of team {0}'.format(team_number+1))
-    model.solve(solver=solver, solve_kwargs={'tee': solver_verbose})
-    
-    logging.info('Store the energy system with the results.')
+    solver_results = solve(model, cfg, aenderungen)
+    profil.messpunkt('solve')
+    _erfasse_solverzeit(solver_results)
     
     # add results to the energy system to make it possible to store them.
-    energysystem.results['main'] = solph.processing.results(model)
-    energysystem.results['meta'] = solph.processing.meta_results(model)
-    results = energysystem.results['main']
-    
-    
-    energysystem.dump(dpath=abs_path + "/results",
-                      filename="model_team_{0}.oemof".format(team_number+1))
\ No newline at end of file
+    # Ein neues Woerterbuch je Lauf: mit reuse_model wird das Energiesystem
+    # vom naechsten Szenario weiterverwendet, zurueckgegebene Ergebnisse
+    # duerfen sich dadurch nicht aendern
+    results = {}
+    if aggregation is not None:
+        results['tsa'] = aggregation.ergebnis(model, date_time_index)
+    if cfg.get('result_processing', 'direct') == 'direct':
+        # Flussmatrix direkt aus den Variablenwerten
+        results['flussmatrix'] = flussmatrix_aus_modell(model)
+    else:
+        results['main'] = solph.processing.results(model)
+    if cfg.get('duals', False):
+        results['schattenpreise'] = schattenpreise_aus_modell(model)
+    profil.messpunkt('processing_results')
+    results['meta'] = solph.processing.meta_results(model)
+    profil.messpunkt('meta_results')
+    results['schluessel'] = schluessel
+    energysystem.results = results
+    
+    if cfg.get('dump_results', True) and not overrides:
+        _dump(cfg, energysystem, team_number)
+    
+    return results
+
+
+def _run_rolling_horizon(cfg, team_number, param_value, data,
+                         date_time_index, dump, schluessel=None):
+    """Investment sizes from a solve on typical periods, then the dispatch
+    of the full time series in windows (see Lehrbeispiel_Horizont)."""
+    cfg_stufe1 = dict(cfg, typical_periods=cfg.get('typical_periods') or 12)
+    if cfg.get('duals', False):
+        logging.warning('No marginal costs (duals) with the rolling '
+                        'horizon.')
+    logging.info('Solve the investment problem of team {0} on {1} typical '
+                 'periods'.format(team_number+1,
+                                  cfg_stufe1['typical_periods']))
+    energysystem, model, aggregation = _create(cfg_stufe1, param_value, data,
+                                               date_time_index)
+    solver_results = solve(model, cfg_stufe1)
+    profil.messpunkt('solve')
+    _erfasse_solverzeit(solver_results)
+    groessen = investitionsgroessen(model)
+    meta = solph.processing.meta_results(model)
+    profil.messpunkt('meta_results')
+
+    logging.info('Solve the dispatch of team {0}'.format(team_number+1))
+    energysystem = solph.EnergySystem(timeindex=date_time_index)
+    energysystem.results = {
+        'main': rollierender_horizont(create_model, cfg, param_value, data,
+                                      date_time_index, groessen),
+        'meta': meta,
+        'schluessel': schluessel}
+    profil.messpunkt('rolling_horizon')
+    if cfg.get('dump_results', True) and dump:
+        _dump(cfg, energysystem, team_number)
+    return energysystem.results
+
+
+def _dump(cfg, energysystem, team_number):
+    """Store the results in the results store of the team (or the energy
+    system with the results as .oemof file) in the background, the
+    evaluation can go on with the results in memory."""
+    if cfg.get('results_format', 'store') == 'store':
+        logging.info('Store the results in {0}.'.format(
+            ablage.pfad(team_number)))
+        ziel, args = ablage.speichere, (energysystem.results, team_number)
+        kwargs = {}
+    else:
+        logging.info('Store the energy system with the results.')
+        ziel, args = energysystem.dump, ()
+        kwargs = {'dpath': abs_path + "/results",
+                  'filename': "model_team_{0}.oemof".format(team_number+1)}
+    dump_thread = threading.Thread(target=_dump_gemessen,
+                                   args=(ziel,) + args, kwargs=kwargs)
+    dump_thread.start()
+    _dump_threads.append(dump_thread)
+
+
+def _dump_gemessen(ziel, *args, **kwargs):
+    with profil.phase('dump'):
+        ziel(*args, **kwargs)
+
+
+def _erfasse_solverzeit(solver_results):
+    """Record the wall time reported by the solver (part of 'solve', which
+    also includes writing the model and reading the solution)."""
+    try:
+        sekunden = float(solver_results.solver.wallclock_time)
+    except (AttributeError, TypeError, ValueError):
+        return
+    profil.erfasse('solver_wallclock', sekunden)
+
+
+def wait_for_dumps():
+    """Block until all results files started by run_model are written."""
+    while _dump_threads:
+        _dump_threads.pop().join()
\ No newline at end of file
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ergebnisablage
+--------------
+
+Compact results store of one team (results_format: 'store' in config.yaml),
+replacing the pickled .oemof file. The store is the folder
+results/results_<n>/model_team_<n> with
+
+* fluesse.npy: the flows of the `Flussmatrix` on the full time index
+  (flows x timesteps, float64, one contiguous row per flow),
+* speicherstand.npy: the storage contents (storages x timesteps),
+* schattenpreise.npy: the marginal costs of the buses (buses x timesteps,
+  only with duals in config.yaml),
+* ergebnis.json: row names, investment sizes, time index, the meta
+  results (objective, solver status) of the optimisation and the content
+  key of the inputs (see Lehrbeispiel_Inkrementell).
+
+The arrays are read memory mapped, so loading one flow or one investment
+size does not read the rest of the results. The format does not depend on
+the versions of oemof, Pyomo or pickle. HDF5, Zarr or Parquet would need an
+additional package, the NumPy format covers the same use here.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import oemof.solph as solph
+
+from Lehrbeispiel_Daten import abs_path
+from Lehrbeispiel_Ergebnisse import Flussmatrix, flussmatrix_aus_ergebnissen
+from Lehrbeispiel_Aggregation import disaggregiere
+
+
+FORMAT = 1
+
+
+def eintrag(results, key):
+    """Return results[key] or None (results may be a pyomo SolverResults
+    object without dict methods)."""
+    try:
+        return results[key]
+    except (KeyError, AttributeError):
+        return None
+
+
+def flussmatrix_aus_results(results):
+    """Return the `Flussmatrix` on the full time index of the results of
+    `run_model` (direct or oemof results, with or without typical
+    periods)."""
+    flussmatrix = eintrag(results, 'flussmatrix')
+    if flussmatrix is None:
+        # oemof-Ergebnisse (result_processing: 'oemof')
+        string_results = solph.views.convert_keys_to_strings(results['main'])
+        flussmatrix = flussmatrix_aus_ergebnissen(string_results)
+    schattenpreise = eintrag(results, 'schattenpreise')
+    if schattenpreise:
+        flussmatrix.schattenpreise = schattenpreise
+    tsa = eintrag(results, 'tsa')
+    if tsa is not None:
+        # Ergebnisse der typischen Perioden auf das ganze Jahr abbilden
+        flussmatrix = disaggregiere(flussmatrix, tsa)
+    return flussmatrix
+
+
+def pfad(team_number):
+    """Folder of the results store of a team."""
+    return os.path.join(abs_path, 'results',
+                        'results_{0}'.format(team_number+1),
+                        'model_team_{0}'.format(team_number+1))
+
+
+def _zeitindex_json(zeitindex):
+    if zeitindex.freq is not None:
+        return {'start': zeitindex[0].isoformat(),
+                'freq': zeitindex.freqstr,
+                'periods': len(zeitindex)}
+    return {'values': [t.isoformat() for t in zeitindex]}
+
+
+def _zeitindex(kopf):
+    if 'values' in kopf:
+        return pd.DatetimeIndex(kopf['values'])
+    return pd.date_range(kopf['start'], periods=kopf['periods'],
+                         freq=kopf['freq'])
+
+
+def speichere(results, team_number):
+    """Write the results of `run_model` to the store of the team. The
+    folder is written next to the old one and replaces it at the end."""
+    flussmatrix = flussmatrix_aus_results(results)
+    ziel = pfad(team_number)
+    tmp = ziel + '.tmp'
+    if os.path.exists(tmp):
+        shutil.rmtree(tmp)
+    os.makedirs(tmp)
+
+    speicher = list(flussmatrix.speicherstand)
+    np.save(os.path.join(tmp, 'fluesse.npy'),
+            np.ascontiguousarray(flussmatrix.werte, dtype=float))
+    speicherstand = np.zeros((len(speicher), len(flussmatrix.zeitindex)))
+    for i, name in enumerate(speicher):
+        speicherstand[i] = flussmatrix.speicherstand[name]
+    np.save(os.path.join(tmp, 'speicherstand.npy'), speicherstand)
+    busse = list(flussmatrix.schattenpreise)
+    if busse:
+        np.save(os.path.join(tmp, 'schattenpreise.npy'),
+                np.array([flussmatrix.schattenpreise[b] for b in busse],
+                         dtype=float))
+
+    kopf = {'format': FORMAT,
+            'team': team_number + 1,
+            'fluesse': flussmatrix.namen,
+            'speicher': speicher,
+            'busse': busse,
+            'investitionen': flussmatrix.investitionen,
+            'zeitindex': _zeitindex_json(flussmatrix.zeitindex),
+            'meta': eintrag(results, 'meta'),
+            # Inhaltsschluessel der Eingaben (incremental in config.yaml)
+            'schluessel': eintrag(results, 'schluessel')}
+    with open(os.path.join(tmp, 'ergebnis.json'), 'w') as f:
+        # meta enthaelt teils Pyomo-/NumPy-Typen
+        json.dump(kopf, f, indent=1, default=str)
+
+    if os.path.exists(ziel):
+        shutil.rmtree(ziel)
+    os.replace(tmp, ziel)
+    return ziel
+
+
+def vorhanden(team_number):
+    return os.path.exists(os.path.join(pfad(team_number), 'ergebnis.json'))
+
+
+def lade_kopf(team_number):
+    """Return names, investment sizes, time index definition and meta
+    results of the store (no time series are read)."""
+    with open(os.path.join(pfad(team_number), 'ergebnis.json')) as f:
+        kopf = json.load(f)
+    if kopf.get('format') != FORMAT:
+        raise ValueError('Unknown format {0} of the results store {1}'.format(
+            kopf.get('format'), pfad(team_number)))
+    return kopf
+
+
+def lade(team_number):
+    """Return the `Flussmatrix` of the store with memory mapped (read-only)
+    arrays."""
+    kopf = lade_kopf(team_number)
+    werte = np.load(os.path.join(pfad(team_number), 'fluesse.npy'),
+                    mmap_mode='r')
+    inhalt = np.load(os.path.join(pfad(team_number), 'speicherstand.npy'),
+                     mmap_mode='r')
+    preise = {}
+    if kopf.get('busse'):
+        preise = dict(zip(kopf['busse'], np.load(
+            os.path.join(pfad(team_number), 'schattenpreise.npy'),
+            mmap_mode='r')))
+    return Flussmatrix(kopf['fluesse'], werte, _zeitindex(kopf['zeitindex']),
+                       kopf['investitionen'],
+                       dict(zip(kopf['speicher'], inhalt)), preise)
+
+
+def lade_fluss(team_number, name):
+    """Return one flow (short name of `FLUESSE`) of a team as Series; only
+    this row is read from disk."""
+    kopf = lade_kopf(team_number)
+    werte = np.load(os.path.join(pfad(team_number), 'fluesse.npy'),
+                    mmap_mode='r')
+    return pd.Series(np.array(werte[kopf['fluesse'].index(name)]),
+                     index=_zeitindex(kopf['zeitindex']), name=name)
+
+
+def lade_schattenpreise(team_number):
+    """Return the marginal costs of all buses of a team as DataFrame (one
+    column per bus, empty without duals), read in one block."""
+    kopf = lade_kopf(team_number)
+    zeitindex = _zeitindex(kopf['zeitindex'])
+    if not kopf.get('busse'):
+        return pd.DataFrame(index=zeitindex)
+    preise = np.load(os.path.join(pfad(team_number), 'schattenpreise.npy'))
+    return pd.DataFrame(preise.T, index=zeitindex, columns=kopf['busse'])
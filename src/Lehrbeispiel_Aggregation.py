@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+"""
+Zeitreihenaggregation
+---------------------
+
+Typical periods for fast screening runs. The periods (e.g. days) of the
+input time series (irradiation, P*, Q*) are clustered with k-medoids or
+hierarchical clustering (Ward) and the energy system is built on the
+representative periods only. Every time step of the reduced model is
+weighted with the number of original periods it stands for.
+
+Storages are linked across the original periods (Kotzur et al. 2018): the
+storage content inside a typical period is relative to the start of the
+period, the content at the start of every original period is an additional
+variable. The results are mapped back to the full time index for the
+evaluation with `disaggregiere`.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import logging
+import numpy as np
+import pyomo.environ as po
+
+from Lehrbeispiel_Ergebnisse import Flussmatrix
+
+
+# Zeitreihen, nach denen die Perioden gruppiert werden
+MERKMALE = ['Sol_irradiation [Wh/sqm]', 'P*', 'Q*']
+
+# Zeitreihen, deren Spitzenwert in einer eigenen Periode abgebildet wird
+SPITZEN = ['P*', 'Q*']
+
+
+def _k_medoids(distanzen, k, max_iterationen=100):
+    """Cluster with k-medoids (greedy start as in PAM, then alternating
+    assignment and medoid update). Returns medoids and assignment."""
+    medoide = [int(np.argmin(distanzen.sum(axis=1)))]
+    naechste = distanzen[medoide[0]].copy()
+    while len(medoide) < k:
+        gewinn = np.maximum(naechste[None, :] - distanzen, 0).sum(axis=1)
+        gewinn[medoide] = -1
+        neu = int(np.argmax(gewinn))
+        medoide.append(neu)
+        naechste = np.minimum(naechste, distanzen[neu])
+
+    for _ in range(max_iterationen):
+        zuordnung = np.argmin(distanzen[medoide], axis=0)
+        neue_medoide = []
+        for j, medoid in enumerate(medoide):
+            mitglieder = np.flatnonzero(zuordnung == j)
+            if len(mitglieder) == 0:
+                neue_medoide.append(medoid)
+                continue
+            kosten = distanzen[np.ix_(mitglieder, mitglieder)].sum(axis=0)
+            neue_medoide.append(int(mitglieder[np.argmin(kosten)]))
+        if neue_medoide == medoide:
+            break
+        medoide = neue_medoide
+    return np.array(medoide), np.argmin(distanzen[medoide], axis=0)
+
+
+def _hierarchisch(merkmale, distanzen, k):
+    """Agglomerative clustering with the Ward criterion (Lance-Williams
+    update), every cluster is represented by the member closest to its
+    centroid. Returns medoids and assignment."""
+    n = len(merkmale)
+    d = distanzen.copy()
+    np.fill_diagonal(d, np.inf)
+    groesse = np.ones(n)
+    cluster = np.arange(n)
+    for _ in range(n - k):
+        i, j = np.unravel_index(np.argmin(d), d.shape)
+        if i > j:
+            i, j = j, i
+        neu = ((groesse[i] + groesse) * d[i] + (groesse[j] + groesse) * d[j]
+               - groesse * d[i, j]) / (groesse[i] + groesse[j] + groesse)
+        d[i, :] = neu
+        d[:, i] = neu
+        d[i, i] = np.inf
+        d[j, :] = np.inf
+        d[:, j] = np.inf
+        groesse[i] += groesse[j]
+        cluster[cluster == j] = i
+
+    medoide = []
+    zuordnung = np.zeros(n, dtype=int)
+    for j, c in enumerate(np.unique(cluster)):
+        mitglieder = np.flatnonzero(cluster == c)
+        schwerpunkt = merkmale[mitglieder].mean(axis=0)
+        abstand = ((merkmale[mitglieder] - schwerpunkt) ** 2).sum(axis=1)
+        medoide.append(int(mitglieder[np.argmin(abstand)]))
+        zuordnung[mitglieder] = j
+    return np.array(medoide), zuordnung
+
+
+class Aggregation(object):
+    """Typical periods of the time series and the mapping of all original
+    time steps onto the time steps of the reduced model.
+
+    `perioden` are the numbers of the original periods used as typical
+    periods, `zuordnung` holds the typical period (0...k-1) of every
+    original period.
+    """
+
+    def __init__(self, perioden, zuordnung, schritte_je_periode,
+                 anzahl_schritte):
+        self.perioden = np.asarray(perioden)
+        self.zuordnung = np.asarray(zuordnung)
+        self.schritte_je_periode = schritte_je_periode
+        self.anzahl_schritte = anzahl_schritte
+        self._speicher = []
+        self._verknuepfung = None
+
+        n = schritte_je_periode
+        # Laenge der Originalperioden (letzte Periode evtl. unvollstaendig)
+        self.laengen = np.minimum(
+            n, anzahl_schritte - n * np.arange(len(self.zuordnung)))
+        # Position der Modellzeitschritte in der vollen Zeitreihe
+        self.schritte = (self.perioden[:, None] * n
+                         + np.arange(n)).ravel()
+        # Modellzeitschritt jedes Originalzeitschritts
+        t = np.arange(anzahl_schritte)
+        self.abbildung = self.zuordnung[t // n] * n + t % n
+        # Anzahl der Originalzeitschritte je Modellzeitschritt
+        self.gewichte = np.bincount(self.abbildung,
+                                    minlength=len(self.schritte)).astype(float)
+
+    def __len__(self):
+        return len(self.schritte)
+
+    def reduziere(self, data):
+        """Return the time series of `data` at the model time steps."""
+        return {k: np.asarray(v)[self.schritte] for k, v in data.items()}
+
+    def objective_weighting(self, zeitindex):
+        """Weights of the variable costs per model time step
+        (number of represented time steps x length of a time step in h)."""
+        return self.gewichte * zeitindex.freq.nanos / 3.6e12
+
+    def verknuepfe_speicher(self, model):
+        """Link the storage content of all investment storages across the
+        original periods.
+
+        Inside a typical period the storage content starts at zero and can
+        become negative. The content at the start of every original period
+        is a variable, it is carried over with the losses of the period and
+        the content change of its typical period. Upper and lower limits are
+        kept with the extreme values of the content inside the typical
+        period (conservative for storages with losses).
+        """
+        if self._verknuepfung is not None:
+            # wiederverwendetes Modell: Verknuepfung wieder einhaengen
+            model.add_component('Speicherverknuepfung', self._verknuepfung)
+            return
+        if not hasattr(model, 'GenericInvestmentStorageBlock'):
+            return
+        block = model.GenericInvestmentStorageBlock
+        self._speicher = list(block.INVESTSTORAGES)
+        if not self._speicher:
+            return
+
+        n = self.schritte_je_periode
+        anzahl_typisch = len(self.perioden)
+        anzahl_perioden = len(self.zuordnung)
+
+        verknuepfung = po.Block()
+        model.add_component('Speicherverknuepfung', verknuepfung)
+        self._verknuepfung = verknuepfung
+        speicher_nr = range(len(self._speicher))
+        verknuepfung.stand = po.Var(speicher_nr, range(anzahl_perioden + 1),
+                                    within=po.NonNegativeReals)
+        verknuepfung.intra_max = po.Var(speicher_nr, range(anzahl_typisch),
+                                        within=po.NonNegativeReals)
+        verknuepfung.intra_min = po.Var(speicher_nr, range(anzahl_typisch),
+                                        within=po.NonPositiveReals)
+        verknuepfung.constraints = po.ConstraintList()
+        c = verknuepfung.constraints
+
+        for s, speicher in enumerate(self._speicher):
+            inflow = [i for i in speicher.inputs][0]
+            outflow = [o for o in speicher.outputs][0]
+            inhalt = block.storage_content
+            kapazitaet = speicher.investment.existing + block.invest[speicher]
+
+            # Speicherinhalt relativ zum Periodenbeginn
+            block.balance_first[speicher].deactivate()
+            for k in range(1, anzahl_typisch):
+                block.balance[speicher, k * n].deactivate()
+            if speicher in block.INVESTSTORAGES_BALANCED:
+                block.balanced_cstr[speicher].deactivate()
+            for t in model.TIMESTEPS:
+                inhalt[speicher, t].setlb(None)
+                block.max_storage_content[speicher, t].deactivate()
+                if speicher in block.MIN_INVESTSTORAGES:
+                    block.min_storage_content[speicher, t].deactivate()
+
+            for k in range(anzahl_typisch):
+                t0 = k * n
+                c.add(inhalt[speicher, t0] == (
+                    model.flow[inflow, speicher, t0]
+                    * speicher.inflow_conversion_factor[t0]
+                    - model.flow[speicher, outflow, t0]
+                    / speicher.outflow_conversion_factor[t0]
+                    - speicher.fixed_losses_relative[t0] * kapazitaet
+                    - speicher.fixed_losses_absolute[t0])
+                    * model.timeincrement[t0])
+                for t in range(t0, t0 + n):
+                    c.add(verknuepfung.intra_max[s, k] >= inhalt[speicher, t])
+                    c.add(verknuepfung.intra_min[s, k] <= inhalt[speicher, t])
+
+            for p in range(anzahl_perioden):
+                k = self.zuordnung[p]
+                schritte = range(k * n, k * n + self.laengen[p])
+                verlust = float(np.prod(
+                    [(1 - speicher.loss_rate[t]) ** model.timeincrement[t]
+                     for t in schritte]))
+                c.add(verknuepfung.stand[s, p + 1]
+                      == verknuepfung.stand[s, p] * verlust
+                      + inhalt[speicher, schritte[-1]])
+                c.add(verknuepfung.stand[s, p] + verknuepfung.intra_max[s, k]
+                      <= kapazitaet * speicher.max_storage_level[0])
+                c.add(verknuepfung.stand[s, p] * verlust
+                      + verknuepfung.intra_min[s, k]
+                      >= kapazitaet * speicher.min_storage_level[0])
+
+            c.add(verknuepfung.stand[s, 0] == block.init_content[speicher])
+            if speicher in block.INVESTSTORAGES_BALANCED:
+                c.add(verknuepfung.stand[s, anzahl_perioden]
+                      == block.init_content[speicher])
+
+    def ergebnis(self, model, zeitindex):
+        """Return the information needed to disaggregate the results (stored
+        as results['tsa']).
+
+        The linking variables are removed from the model afterwards, because
+        the oemof result processing only knows variables indexed by nodes
+        (`verknuepfe_speicher` adds them again for a reused model).
+        """
+        speicherstand = {}
+        if self._verknuepfung is not None:
+            verknuepfung = self._verknuepfung
+            for s, speicher in enumerate(self._speicher):
+                speicherstand[speicher.label] = np.array(
+                    [verknuepfung.stand[s, p].value
+                     for p in range(len(self.zuordnung) + 1)])
+            model.del_component(verknuepfung)
+        return {'zeitindex': zeitindex,
+                'abbildung': self.abbildung,
+                'perioden': self.perioden,
+                'zuordnung': self.zuordnung,
+                'schritte_je_periode': self.schritte_je_periode,
+                'speicherstand_periodenbeginn': speicherstand}
+
+
+def typische_perioden(data, anzahl_schritte, cfg):
+    """Select the typical periods of the time series in `data` (first
+    `anzahl_schritte` values) according to the settings in `cfg`.
+
+    Returns None if the number of typical periods is not smaller than the
+    number of periods. The peak periods are part of the typical periods,
+    ValueError if there are not fewer peak periods than typical periods.
+    """
+    n = cfg.get('time_steps_per_period', 24)
+    anzahl_typisch = cfg['typical_periods']
+    methode = cfg.get('clustering_method', 'k_medoids')
+
+    # Nur vollstaendige Perioden kommen als typische Periode in Frage
+    vollstaendig = anzahl_schritte // n
+    anzahl_perioden = -(-anzahl_schritte // n)
+    if anzahl_typisch >= vollstaendig:
+        logging.warning('{0} typical periods requested for {1} periods, the '
+                        'full time series is used.'.format(anzahl_typisch,
+                                                           vollstaendig))
+        return None
+
+    # Merkmale: Profile der Perioden, jede Zeitreihe auf ihr Maximum normiert
+    profile = []
+    for name in MERKMALE:
+        werte = np.zeros(anzahl_perioden * n)
+        werte[:anzahl_schritte] = np.asarray(data[name][:anzahl_schritte],
+                                             dtype=float)
+        maximum = np.abs(werte).max()
+        if maximum > 0:
+            werte /= maximum
+        profile.append(werte.reshape(anzahl_perioden, n))
+    merkmale = np.concatenate(profile, axis=1)
+
+    # Perioden mit den Spitzenwerten des Bedarfs werden nicht geclustert
+    spitzen = []
+    if cfg.get('peak_periods', True):
+        for name in SPITZEN:
+            werte = np.asarray(data[name][:vollstaendig * n], dtype=float)
+            p = int(np.argmax(werte) // n)
+            if p not in spitzen:
+                spitzen.append(p)
+    if anzahl_typisch <= len(spitzen):
+        raise ValueError('typical_periods ({0}) must be larger than the '
+                         'number of peak periods ({1}), or switch off '
+                         'peak_periods.'.format(anzahl_typisch,
+                                                len(spitzen)))
+    kandidaten = np.array([p for p in range(vollstaendig)
+                           if p not in spitzen])
+    k = anzahl_typisch - len(spitzen)
+
+    x = merkmale[kandidaten]
+    quadrate = (x ** 2).sum(axis=1)
+    distanzen = np.maximum(
+        quadrate[:, None] + quadrate[None, :] - 2 * x.dot(x.T), 0)
+    if methode == 'k_medoids':
+        medoide, _ = _k_medoids(distanzen, k)
+    elif methode == 'hierarchical':
+        medoide, _ = _hierarchisch(x, distanzen, k)
+    else:
+        raise ValueError('Unknown clustering_method: {0}'.format(methode))
+    perioden = np.concatenate([kandidaten[medoide], spitzen]).astype(int)
+
+    # Alle Perioden (auch die unvollstaendige letzte) der aehnlichsten
+    # typischen Periode zuordnen, Spitzenperioden nur sich selbst
+    laengen = np.minimum(n, anzahl_schritte - n * np.arange(anzahl_perioden))
+    maske = np.tile(np.arange(n), len(MERKMALE))[None, :] < laengen[:, None]
+    abstand = (((merkmale[:, None, :] - merkmale[None, perioden, :]) ** 2)
+               * maske[:, None, :]).sum(axis=2)
+    abstand[:, len(medoide):] = np.inf
+    zuordnung = np.argmin(abstand, axis=1)
+    for j, p in enumerate(spitzen):
+        zuordnung[p] = len(medoide) + j
+
+    logging.info('Time series aggregation: {0} of {1} periods ({2}, {3} '
+                 'peak periods).'.format(len(perioden), anzahl_perioden,
+                                         methode, len(spitzen)))
+    return Aggregation(perioden, zuordnung, n, anzahl_schritte)
+
+
+def disaggregiere(flussmatrix, tsa):
+    """Map a `Flussmatrix` of the reduced model back onto the full time
+    index (tsa = results['tsa']).
+
+    The storage content of the reduced model is relative to the beginning
+    of the period, the content at the beginning of every period is added
+    (losses within the period neglected).
+    """
+    n = tsa['schritte_je_periode']
+    periode = np.arange(len(tsa['abbildung'])) // n
+    speicherstand = {}
+    for name, inhalt in flussmatrix.speicherstand.items():
+        speicherstand[name] = inhalt[tsa['abbildung']]
+        if name in tsa['speicherstand_periodenbeginn']:
+            speicherstand[name] = (
+                speicherstand[name]
+                + tsa['speicherstand_periodenbeginn'][name][periode])
+    schattenpreise = {bus: preis[tsa['abbildung']]
+                      for bus, preis in flussmatrix.schattenpreise.items()}
+    return Flussmatrix(flussmatrix.namen,
+                       flussmatrix.werte[:, tsa['abbildung']],
+                       tsa['zeitindex'], flussmatrix.investitionen,
+                       speicherstand, schattenpreise)
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark
+---------
+
+Reproducible benchmark of the team pipeline (`run_model` and
+`display_results`), defined in experiment_config/benchmark.yaml. Every case
+sets the number of time steps and teams:
+
+* Up to the length of the input time series its first time steps are used.
+  Longer horizons use a synthetic time series with a finer time step (every
+  step of the input repeated, the series are powers), e.g. 35040 time
+  steps of 15 min.
+* More teams than parameter files cycle through the shipped
+  parameters_Team_0X.csv files.
+
+Every case runs in a fresh process with profiling on. Recorded are wall
+time, peak memory, model size (variables and constraints of the first
+team), build, solve and solver time. The results are written to
+results/benchmark/benchmark_<date>.json and compared with the baseline in
+the same folder (written by the first run); cases that got slower or larger
+than the tolerance are flagged as regression (exit code 1).
+
+The cases run in the work folder results/benchmark/lauf with copies of
+the inputs (the synthetic time series are written there as well) and their
+own results and data_postprocessed folders; the results of normal runs and
+results/teams.sqlite are not touched. Start with
+
+    python Lehrbeispiel_Benchmark.py
+
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import json
+import logging
+import math
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yaml
+from oemof.tools import logger
+
+from Lehrbeispiel_Daten import abs_path, load_config, load_time_series
+import Lehrbeispiel_Profil as profil
+
+
+# Phasen von run_model, die zum Modellaufbau zaehlen
+AUFBAU = ['annuity', 'components', 'model_build', 'collector_area']
+
+# Kennzahlen, die mit der Baseline verglichen werden: (Schluessel, Einheit)
+VERGLEICH = [('wall_seconds', 's'), ('solve_seconds', 's'),
+             ('peak_rss_mb', 'mb')]
+
+# Arbeitsverzeichnis der Faelle in results/benchmark
+ARBEITSVERZEICHNIS = 'lauf'
+
+
+def _arbeitsverzeichnis(cfg, verzeichnis):
+    """Create the work folder of the cases (project layout with copies of
+    the inputs) and return its path."""
+    arbeit = os.path.join(verzeichnis, ARBEITSVERZEICHNIS)
+    for ordner in ['data', 'experiment_config']:
+        shutil.copytree(os.path.join(abs_path, ordner),
+                        os.path.join(arbeit, ordner), dirs_exist_ok=True)
+    for ordner, datei in [('data_raw', cfg['time_series_file_name']),
+                          ('data_postprocessed',
+                           'Auswertungsergebnisse_Text.csv')]:
+        os.makedirs(os.path.join(arbeit, ordner), exist_ok=True)
+        shutil.copy2(os.path.join(abs_path, ordner, datei),
+                     os.path.join(arbeit, ordner, datei))
+    return arbeit
+
+
+def _zeitreihe(cfg, time_steps, arbeit):
+    """Return file name and time step frequency of a time series with at
+    least `time_steps` steps (synthetic in the work folder `arbeit` if the
+    input is too short)."""
+    data = load_time_series(cfg)
+    spalten = list(data)
+    laenge = int(np.isfinite(data[spalten[0]]).sum())
+    frequenz = cfg.get('time_step_frequency', 'H')
+    if time_steps <= laenge:
+        return cfg['time_series_file_name'], frequenz
+
+    faktor = int(math.ceil(time_steps / float(laenge)))
+    name = 'data_raw_benchmark_{0}x.csv'.format(faktor)
+    file_path = os.path.join(arbeit, 'data_raw', name)
+    if not os.path.exists(file_path):
+        # Leistungen: jeder Zeitschritt wird wiederholt, die Energie je
+        # Stunde bleibt mit der kuerzeren Schrittweite gleich
+        df = pd.DataFrame({c: np.repeat(np.asarray(data[c][:laenge]),
+                                        faktor)
+                           for c in spalten if c != 'Counter'})
+        df.insert(0, 'Counter', np.arange(1, len(df) + 1))
+        df.to_csv(file_path, sep=';', index=False)
+    frequenz = pd.tseries.frequencies.to_offset(
+        pd.Timedelta(pd.tseries.frequencies.to_offset(frequenz)) / faktor)
+    return name, frequenz.freqstr
+
+
+def _config(cfg, spec, fall, verzeichnis, arbeit):
+    """Write the configuration of one case and return its path."""
+    dateien = [f for f in cfg['design_parameters_file_name']
+               if os.path.exists(os.path.join(abs_path, 'data', f))]
+    teams = fall['teams']
+    fall_cfg = dict(cfg)
+    fall_cfg.update(spec.get('settings', {}))
+    time_series_file_name, frequenz = _zeitreihe(cfg, fall['time_steps'],
+                                                 arbeit)
+    fall_cfg.update({
+        'debug': False,
+        'profiling': True,
+        'number_of_time_steps': fall['time_steps'],
+        'time_series_file_name': time_series_file_name,
+        'time_step_frequency': frequenz,
+        'number_of_teams': teams,
+        'team_names': [cfg['team_names'][n] if n < len(dateien)
+                       else 'Team {0}'.format(n + 1) for n in range(teams)],
+        'design_parameters_file_name': [dateien[n % len(dateien)]
+                                        for n in range(teams)]})
+    file_path = os.path.join(verzeichnis, 'config_{0}.yaml'.format(
+        _name(fall)))
+    with open(file_path, 'w') as f:
+        yaml.safe_dump(fall_cfg, f, default_flow_style=False)
+    return file_path
+
+
+def _name(fall):
+    return '{0}x{1}'.format(fall['time_steps'], fall['teams'])
+
+
+def rechne_fall(config_path):
+    """Run all teams of a case configuration (in a fresh process) and
+    return the measurements."""
+    from main import run_teams, _profile_path
+
+    cfg = load_config(config_path)
+    start = time.perf_counter()
+    status_list = run_teams(config_path)
+    wall = time.perf_counter() - start
+
+    df = profil.lade([_profile_path(n) for n in range(cfg['number_of_teams'])])
+    groesse = df[df['phase'] == 'model_size'] if not df.empty else df
+    peaks = [p for p in (profil.peak_rss(), profil.peak_rss(kinder=True))
+             if p is not None]
+
+    def summe(phasen):
+        if df.empty:
+            return None
+        return round(float(df.loc[df['phase'].isin(phasen), 'seconds'].sum()),
+                     3)
+
+    return {'time_steps': cfg['number_of_time_steps'],
+            'teams': cfg['number_of_teams'],
+            'ok': sum(s['Status'] == 'ok' for s in status_list),
+            'wall_seconds': round(wall, 3),
+            'peak_rss_mb': round(max(peaks), 1) if peaks else None,
+            'variables': (int(groesse['variables'].iloc[0])
+                          if len(groesse) else None),
+            'constraints': (int(groesse['constraints'].iloc[0])
+                            if len(groesse) else None),
+            'build_seconds': summe(AUFBAU),
+            'solve_seconds': summe(['solve']),
+            'solver_seconds': summe(['solver_wallclock'])}
+
+
+def vergleiche(ergebnisse, baseline, spec):
+    """Return the regressions of `ergebnisse` against `baseline` (both
+    {case: measurements}) as list of messages."""
+    toleranz = spec.get('tolerance', 0.2)
+    minimum = {'s': spec.get('min_seconds', 1.0), 'mb': spec.get('min_mb', 20)}
+    meldungen = []
+    for name, werte in ergebnisse.items():
+        basis = baseline.get(name)
+        if basis is None:
+            continue
+        if werte['ok'] < basis['ok']:
+            meldungen.append('{0}: {1} of {2} teams failed'.format(
+                name, werte['teams'] - werte['ok'], werte['teams']))
+        for schluessel, einheit in VERGLEICH:
+            alt, neu = basis.get(schluessel), werte.get(schluessel)
+            if alt is None or neu is None:
+                continue
+            if neu > alt * (1 + toleranz) and neu - alt > minimum[einheit]:
+                meldungen.append('{0}: {1} {2:.1f} -> {3:.1f} (+{4:.0%})'
+                                 .format(name, schluessel, alt, neu,
+                                         neu / alt - 1))
+        if (basis.get('variables'), basis.get('constraints')) != (
+                werte.get('variables'), werte.get('constraints')):
+            logging.warning('{0}: model size changed from {1}/{2} to {3}/{4} '
+                            '(variables/constraints)'.format(
+                                name, basis.get('variables'),
+                                basis.get('constraints'),
+                                werte.get('variables'),
+                                werte.get('constraints')))
+    return meldungen
+
+
+def run_benchmark(config_path, benchmark_path):
+    """Run all cases, store the results and compare them with the
+    baseline. Returns (results {case: measurements}, regressions)."""
+    cfg = load_config(config_path)
+    spec = load_config(benchmark_path)
+    verzeichnis = os.path.join(abs_path, 'results', 'benchmark')
+    os.makedirs(verzeichnis, exist_ok=True)
+    arbeit = _arbeitsverzeichnis(cfg, verzeichnis)
+
+    ergebnisse = {}
+    umgebung = os.environ.get('LEHRBEISPIEL_VERZEICHNIS')
+    os.environ['LEHRBEISPIEL_VERZEICHNIS'] = arbeit
+    try:
+        for fall in spec['cases']:
+            name = _name(fall)
+            logging.info('Benchmark case {0} ({1} time steps, {2} '
+                         'teams)'.format(name, fall['time_steps'],
+                                         fall['teams']))
+            fall_config = _config(cfg, spec, fall, verzeichnis, arbeit)
+            # jeder Fall ohne Ergebnisse vorheriger Faelle
+            shutil.rmtree(os.path.join(arbeit, 'results'),
+                          ignore_errors=True)
+            # eigener, neu gestarteter Prozess je Fall: der Spitzenspeicher
+            # gilt je Fall und die Module lesen das Arbeitsverzeichnis
+            with ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context('spawn')) as pool:
+                ergebnisse[name] = pool.submit(rechne_fall,
+                                               fall_config).result()
+    finally:
+        if umgebung is None:
+            del os.environ['LEHRBEISPIEL_VERZEICHNIS']
+        else:
+            os.environ['LEHRBEISPIEL_VERZEICHNIS'] = umgebung
+
+    protokoll = {'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+                 'python': platform.python_version(),
+                 'platform': platform.platform(),
+                 'solver': spec.get('settings', {}).get('solver',
+                                                        cfg['solver']),
+                 'cases': ergebnisse}
+    file_path = os.path.join(verzeichnis, 'benchmark_{0}.json'.format(
+        time.strftime('%Y%m%d_%H%M%S')))
+    with open(file_path, 'w') as f:
+        json.dump(protokoll, f, indent=2)
+
+    baseline_path = os.path.join(verzeichnis,
+                                 spec.get('baseline', 'baseline.json'))
+    meldungen = []
+    if os.path.exists(baseline_path) and not spec.get('save_baseline', False):
+        with open(baseline_path) as f:
+            meldungen = vergleiche(ergebnisse, json.load(f)['cases'], spec)
+    else:
+        logging.info('Save the baseline {0}'.format(baseline_path))
+        with open(baseline_path, 'w') as f:
+            json.dump(protokoll, f, indent=2)
+    return ergebnisse, meldungen
+
+
+def main():
+    config_file_path = os.path.abspath('../experiment_config/config.yaml')
+    benchmark_file_path = os.path.abspath(
+        '../experiment_config/benchmark.yaml')
+    logger.define_logging(logfile='benchmark.log')
+
+    ergebnisse, meldungen = run_benchmark(config_file_path,
+                                          benchmark_file_path)
+    print('')
+    print('Benchmark')
+    print(pd.DataFrame.from_dict(ergebnisse, orient='index').to_string())
+    if meldungen:
+        print('')
+        print('Regressionen gegenueber der Baseline')
+        for meldung in meldungen:
+            print('  ' + meldung)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+"""
+Gemeinsamer Datenzugriff
+------------------------
+
+Loading of the configuration, the input time series and the parameter files
+of the teams. Every file is parsed only once per process (and therefore once
+per worker of the process pool). The cache is keyed by the file path and the
+modification time of the file, so edited files are read again.
+
+The input time series is additionally converted into a binary sidecar
+(<name>.csv.npy with one row per column, plus <name>.csv.json holding the
+column names and the SHA-256 hash of the CSV file). The sidecar is memory
+mapped and rewritten whenever the hash of the CSV file changes.
+
+The returned objects are shared between all callers and must not be
+modified in place.
+
+All files are found relative to the project folder `abs_path` (the parent
+of src, or the folder in the environment variable LEHRBEISPIEL_VERZEICHNIS).
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import hashlib
+import json
+import logging
+import os
+import numpy as np
+import pandas as pd
+import yaml
+
+
+# Projektverzeichnis (data, data_raw, results, ...); der Benchmark setzt
+# LEHRBEISPIEL_VERZEICHNIS auf sein eigenes Arbeitsverzeichnis
+abs_path = (os.environ.get('LEHRBEISPIEL_VERZEICHNIS')
+            or os.path.dirname(os.path.abspath(os.path.join(__file__, '..'))))
+
+# {(Art, Dateipfad): (Aenderungszeit, Inhalt)}
+_cache = {}
+
+
+def _cached(kind, file_path, loader):
+    """Return the parsed content of `file_path`, parse it only if the file
+    is unknown or was modified since it was parsed."""
+    file_path = os.path.abspath(file_path)
+    mtime = os.path.getmtime(file_path)
+    key = (kind, file_path)
+    if key not in _cache or _cache[key][0] != mtime:
+        _cache[key] = (mtime, loader(file_path))
+    return _cache[key][1]
+
+
+def load_file(file_path, loader):
+    """Return the content of `file_path` parsed with `loader(file_path)`,
+    with the same cache as the files of this module (e.g. the component
+    template)."""
+    return _cached(loader.__name__, file_path, loader)
+
+
+def _read_config(file_path):
+    with open(file_path, 'r') as ymlfile:
+        return yaml.load(ymlfile, Loader=yaml.CLoader)
+
+
+def _read_parameters(file_path):
+    param_df = pd.read_csv(file_path, index_col=1,
+                           sep=';', encoding='unicode_escape')
+    return param_df['value']
+
+
+def load_config(config_path):
+    """Return the experiment configuration (config.yaml) as dictionary."""
+    return _cached('config', config_path, _read_config)
+
+
+def _file_hash(file_path):
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _write_sidecar(file_path, npy_path, json_path, file_hash):
+    """Parse the CSV file once and store it as (columns x rows) array."""
+    logging.info('Convert {0} into binary format.'.format(file_path))
+    df = pd.read_csv(file_path, sep=';')
+    # Textzeilen (z.B. 'Summe' am Dateiende) werden zu NaN
+    values = np.ascontiguousarray(
+        df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float).T)
+    # Erst in temporaere Datei schreiben, damit parallele Prozesse nie
+    # eine halb geschriebene Datei lesen
+    tmp_npy = '{0}.{1}.tmp'.format(npy_path, os.getpid())
+    with open(tmp_npy, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_npy, npy_path)
+    tmp_json = '{0}.{1}.tmp'.format(json_path, os.getpid())
+    with open(tmp_json, 'w') as f:
+        json.dump({'sha256': file_hash, 'columns': list(df.columns)}, f)
+    os.replace(tmp_json, json_path)
+
+
+def _read_time_series(file_path):
+    """Return {column name: 1-D array} with zero-copy views on the memory
+    mapped sidecar of the CSV file."""
+    npy_path = file_path + '.npy'
+    json_path = file_path + '.json'
+    file_hash = _file_hash(file_path)
+
+    header = None
+    if os.path.exists(npy_path) and os.path.exists(json_path):
+        with open(json_path, 'r') as f:
+            header = json.load(f)
+    if header is None or header['sha256'] != file_hash:
+        try:
+            _write_sidecar(file_path, npy_path, json_path, file_hash)
+        except OSError:
+            # z.B. schreibgeschuetzter Ordner: ohne Zwischenspeicher arbeiten
+            logging.warning('Cannot write binary cache for {0}.'.format(
+                file_path))
+            df = pd.read_csv(file_path, sep=';')
+            return {c: pd.to_numeric(df[c], errors='coerce').to_numpy(
+                dtype=float) for c in df.columns}
+        with open(json_path, 'r') as f:
+            header = json.load(f)
+
+    values = np.load(npy_path, mmap_mode='r')
+    return {c: values[i] for i, c in enumerate(header['columns'])}
+
+
+def load_time_series(cfg):
+    """Return the input time series (irradiation, P*, Q*) as dictionary of
+    read-only NumPy arrays keyed by the column names of the CSV file."""
+    file_path = os.path.join(abs_path, 'data_raw',
+                             cfg['time_series_file_name'])
+    return _cached('time_series', file_path, _read_time_series)
+
+
+def time_series_hash(cfg):
+    """Return the SHA-256 hash of the input time series file."""
+    file_path = os.path.join(abs_path, 'data_raw',
+                             cfg['time_series_file_name'])
+    return _cached('hash', file_path, _file_hash)
+
+
+def load_parameters(cfg, team_number):
+    """Return the design parameters of a team as Series indexed by var_name."""
+    file_path = os.path.join(
+        abs_path, 'data', cfg['design_parameters_file_name'][team_number])
+    return _cached('parameters', file_path, _read_parameters)
+
+
+def apply_overrides(param_value, overrides):
+    """Return a copy of the design parameters with the values of
+    `overrides` ({var_name: value}), e.g. for a parameter sweep."""
+    if not overrides:
+        return param_value
+    unknown = [k for k in overrides if k not in param_value.index]
+    if unknown:
+        raise KeyError('Unknown design parameters: {0}'.format(
+            ', '.join(unknown)))
+    param_value = param_value.copy()
+    for key, value in overrides.items():
+        param_value[key] = value
+    return param_value
+
+
+def load_result_labels():
+    """Return the text labels of the evaluation results
+    (Auswertungsergebnisse_Text.csv)."""
+    file_path = os.path.join(abs_path, 'data_postprocessed',
+                             'Auswertungsergebnisse_Text.csv')
+    return _cached('labels', file_path, pd.read_csv)
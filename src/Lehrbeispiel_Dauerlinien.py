@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+Dauerlinien
+-----------
+
+Analyses for the sizing of the components (duration_curves in
+config.yaml): load duration curves of the demands, the generators and the
+grid imports, their full-load hours and heatmaps (hour of the day x day of
+the year). All flows are sorted with one sort of the flow matrix and
+arranged by day with one reshape, not series by series.
+
+In incremental runs the analyses of a team are cached in
+results/results_<n>/analysen_<n>.npz together with the content key of its
+results (see Lehrbeispiel_Inkrementell), so a repeated evaluation of
+unchanged results reads them instead of computing them again.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from Lehrbeispiel_Daten import abs_path
+
+
+# Analysierte Fluesse: (Kurzname der Flussmatrix, Beschriftung,
+# Investitionsgroesse als Bezug der Vollbenutzungsstunden; ohne
+# Investition die Hoechstlast)
+DAUERLINIEN = [('Strombedarf', 'Strombedarf', None),
+               ('Waermebedarf', 'Waermebedarf', None),
+               ('BHKW_th', 'BHKW', 'BHKW'),
+               ('Waermepumpe_th', 'Waermepumpe', 'Waermepumpe'),
+               ('Gaskessel', 'Gaskessel', 'Gaskessel'),
+               ('Strombezug', 'Strombezug', None),
+               ('Waermebezug', 'Waermebezug', None)]
+
+FORMAT = 1
+
+
+class Analysen(object):
+    """Duration curves (flows x time steps, descending), heatmaps (flows x
+    days x time steps per day, NaN outside the time index) and full-load
+    hours of the flows of `DAUERLINIEN`."""
+
+    def __init__(self, namen, dauerlinien, heatmaps, vollbenutzungsstunden,
+                 tage):
+        self.namen = list(namen)
+        self.dauerlinien = dauerlinien
+        self.heatmaps = heatmaps
+        self.vollbenutzungsstunden = vollbenutzungsstunden
+        self.tage = tage
+
+    def dauerlinien_df(self):
+        """Duration curves as DataFrame (index: time step of the sorted
+        series, starting at 1)."""
+        return pd.DataFrame(self.dauerlinien.T, columns=self.namen,
+                            index=pd.RangeIndex(1, self.dauerlinien.shape[1]
+                                                + 1, name='Zeitschritt'))
+
+    def vollbenutzungsstunden_df(self):
+        return pd.DataFrame({'Vollbenutzungsstunden [h]':
+                             self.vollbenutzungsstunden}, index=self.namen)
+
+
+def berechne(flussmatrix):
+    """Compute the `Analysen` of a `Flussmatrix`."""
+    namen = [b for _, b, _ in DAUERLINIEN]
+    werte = np.asarray(flussmatrix.werte[flussmatrix.zeilen(
+        [n for n, _, _ in DAUERLINIEN])], dtype=float)
+    zeitindex = flussmatrix.zeitindex
+    stunden = flussmatrix.schrittweite()
+
+    # Dauerlinien: eine Sortierung der ganzen Matrix
+    dauerlinien = -np.sort(-werte, axis=1)
+
+    # Vollbenutzungsstunden: Energie / installierte Leistung (Investition)
+    # bzw. Energie / Hoechstlast
+    energie = werte.sum(axis=1) * stunden
+    bezug = np.array([flussmatrix.investitionen.get(i, 0.0) if i is not None
+                      else (dauerlinien[z, 0] if dauerlinien.shape[1] else 0)
+                      for z, (_, _, i) in enumerate(DAUERLINIEN)])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vollbenutzungsstunden = np.where(bezug > 1e-6, energie / bezug, 0.0)
+
+    # Heatmaps: Zeitschritte des Tages x Tage, mit NaN auf ganze Tage
+    # aufgefuellt, ein reshape fuer alle Fluesse
+    je_tag = max(int(round(24 / stunden)), 1)
+    if len(zeitindex):
+        vorne = int(round((zeitindex[0] - zeitindex[0].normalize())
+                          / pd.Timedelta(hours=stunden)))
+        tage = pd.date_range(zeitindex[0].normalize(),
+                             periods=-(-(vorne + len(zeitindex)) // je_tag),
+                             freq='D')
+    else:
+        vorne, tage = 0, pd.DatetimeIndex([])
+    gefuellt = np.full((len(namen), len(tage) * je_tag), np.nan)
+    gefuellt[:, vorne:vorne + werte.shape[1]] = werte
+    heatmaps = gefuellt.reshape(len(namen), len(tage), je_tag)
+
+    return Analysen(namen, dauerlinien, heatmaps, vollbenutzungsstunden, tage)
+
+
+def _pfad(team_number):
+    return os.path.join(abs_path, 'results',
+                        'results_{0}'.format(team_number+1),
+                        'analysen_{0}.npz'.format(team_number+1))
+
+
+def analysen(flussmatrix, team_number, schluessel=None):
+    """Return the `Analysen` of a team, read from the cache if it was
+    written for the results with the content key `schluessel` (no cache
+    without key)."""
+    pfad = _pfad(team_number)
+    if schluessel is not None and os.path.exists(pfad):
+        with np.load(pfad) as npz:
+            if (int(npz['format']) == FORMAT
+                    and str(npz['schluessel']) == schluessel):
+                return Analysen(list(npz['namen']), npz['dauerlinien'],
+                                npz['heatmaps'],
+                                npz['vollbenutzungsstunden'],
+                                pd.DatetimeIndex(npz['tage']))
+
+    ergebnis = berechne(flussmatrix)
+    if schluessel is not None:
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        # unter anderem Namen schreiben und ersetzen (np.savez haengt .npz an)
+        tmp = pfad[:-len('.npz')] + '_tmp.npz'
+        np.savez(tmp, format=FORMAT, schluessel=schluessel,
+                 namen=np.array(ergebnis.namen),
+                 dauerlinien=ergebnis.dauerlinien,
+                 heatmaps=ergebnis.heatmaps,
+                 vollbenutzungsstunden=ergebnis.vollbenutzungsstunden,
+                 tage=ergebnis.tage.values)
+        os.replace(tmp, pfad)
+    return ergebnis
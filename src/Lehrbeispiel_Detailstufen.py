@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+Detailstufen
+------------
+
+Level of detail of the time series in the plots and CSV files
+(plot_resolution and plot_max_points in config.yaml). A time series with
+more time steps than plot_max_points (e.g. the whole year with 8760 hourly
+or 35040 quarter-hourly steps) is reduced to daily or weekly values: the
+mean (same energy as the full series, stacked in the plots) and the
+minimum and maximum of every day or week as envelope (CSV files). The
+aggregates of all flows of a window are computed at once with one
+reduction per statistic. Short windows (the seasonal weeks) keep their full
+resolution, 'full' keeps it for every window.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import numpy as np
+import pandas as pd
+
+
+# Detailstufen in der Reihenfolge der automatischen Auswahl:
+# (pandas-Frequenz, Beschriftung)
+STUFEN = [('D', 'Tagesmittel'),
+          ('W', 'Wochenmittel')]
+
+
+def aufloesung(cfg, zeitindex):
+    """Return the frequency the time series over `zeitindex` is reduced to
+    (None for the full resolution)."""
+    einstellung = cfg.get('plot_resolution', 'auto')
+    if einstellung == 'full':
+        return None
+    if einstellung != 'auto':
+        return einstellung
+    maximum = cfg.get('plot_max_points', 1000)
+    if len(zeitindex) <= maximum:
+        return None
+    for freq, _ in STUFEN:
+        if len(_grenzen(zeitindex, freq)) <= maximum:
+            return freq
+    return STUFEN[-1][0]
+
+
+def stufenname(freq):
+    """Label of a level of detail for plot titles."""
+    return dict(STUFEN).get(freq, 'Mittelwerte {0}'.format(freq))
+
+
+def _grenzen(zeitindex, freq):
+    """Positions of the first time step of every day, week, ..."""
+    perioden = zeitindex.to_period(freq)
+    return np.flatnonzero(np.r_[True, perioden[1:] != perioden[:-1]])
+
+
+def vergroebere(df, freq):
+    """Reduce the time series `df` (one column per flow) to the frequency
+    `freq`.
+
+    Returns the means (index: first time step of every period) and the
+    envelope with the columns '<flow>_min' and '<flow>_max'.
+    """
+    grenzen = _grenzen(df.index, freq)
+    werte = df.to_numpy(dtype=float)
+    anzahl = np.diff(np.r_[grenzen, len(df)])
+    index = df.index[grenzen]
+
+    mittel = np.add.reduceat(werte, grenzen, axis=0) / anzahl[:, None]
+    minimum = np.minimum.reduceat(werte, grenzen, axis=0)
+    maximum = np.maximum.reduceat(werte, grenzen, axis=0)
+
+    huelle = pd.DataFrame(np.concatenate([minimum, maximum], axis=1),
+                          index=index,
+                          columns=['{0}_min'.format(c) for c in df.columns]
+                          + ['{0}_max'.format(c) for c in df.columns])
+    return pd.DataFrame(mittel, index=index, columns=df.columns), huelle
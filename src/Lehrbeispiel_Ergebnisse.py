@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+
+"""
+Ergebnismatrix
+--------------
+
+All flow sequences of one team stacked into one contiguous
+(flows x timesteps) NumPy array, together with the investment sizes and the
+storage contents. The postprocessing works on this matrix instead of on the
+individual pandas objects of the oemof results dictionary.
+
+`flussmatrix_aus_modell` reads the matrix directly from the variable values
+of the solved Pyomo model (result_processing: 'direct' in config.yaml),
+without building the oemof results dictionary first.
+
+`schattenpreise_aus_modell` reads the dual values of the bus balances
+(duals in config.yaml) as marginal costs of every bus and time step.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import numpy as np
+import pandas as pd
+
+from Lehrbeispiel_Modell import investitionsgroessen
+
+
+# Kurzname der Zeitreihe: (Quelle, Ziel) im oemof-Ergebnis
+FLUESSE = [
+    ('Gasnetz', ('Gasnetz', 'Erdgas')),
+    ('Strombedarf', ('Strom', 'Strombedarf')),
+    ('Waermebedarf', ('Waerme', 'Waermebedarf')),
+    ('Strombezug', ('Strombezug', 'Strom')),
+    ('Waermebezug', ('Waermebezug', 'Waerme')),
+    ('Stromueberschuss', ('Strom', 'excess_bel')),
+    ('Waermeueberschuss', ('Waerme', 'excess_bth')),
+    ('PV', ('PV', 'Strom')),
+    ('Solarthermie', ('Solarthermie', 'Waerme')),
+    ('Gaskessel', ('Gaskessel', 'Waerme')),
+    ('Gaskessel_gas', ('Erdgas', 'Gaskessel')),
+    ('BHKW_el', ('BHKW', 'Strom')),
+    ('BHKW_th', ('BHKW', 'Waerme')),
+    ('BHKW_gas', ('Erdgas', 'BHKW')),
+    ('Waermepumpe_el', ('Strom', 'Waermepumpe')),
+    ('Waermepumpe_th', ('Waermepumpe', 'Waerme')),
+    ('Stromspeicher_in', ('Strom', 'Stromspeicher')),
+    ('Stromspeicher_out', ('Stromspeicher', 'Strom')),
+    ('Waermespeicher_in', ('Waerme', 'Waermespeicher')),
+    ('Waermespeicher_out', ('Waermespeicher', 'Waerme')),
+]
+
+# Kurzname der Investitionsgroesse: Schluessel im oemof-Ergebnis
+INVESTITIONEN = [
+    ('PV', ('PV', 'Strom')),
+    ('Solarthermie', ('Solarthermie', 'Waerme')),
+    ('Gaskessel', ('Gaskessel', 'Waerme')),
+    ('BHKW', ('BHKW', 'Waerme')),
+    ('Waermepumpe', ('Waermepumpe', 'Waerme')),
+    ('Stromspeicher', ('Stromspeicher', 'None')),
+    ('Waermespeicher', ('Waermespeicher', 'None')),
+]
+
+
+# Speicher mit Speicherinhalt (storage_content)
+SPEICHER = ['Stromspeicher', 'Waermespeicher']
+
+# Busse mit Schattenpreisen der Bilanz
+BUSSE = ['Strom', 'Waerme', 'Erdgas']
+
+
+class Flussmatrix(object):
+    """Flow sequences of one team as (flows x timesteps) array.
+
+    Rows are addressed by the short names of `FLUESSE`. Flows of components
+    that are not part of the energy system are rows of zeros. The storage
+    contents are kept apart in `speicherstand` ({storage: array}), they are
+    no flows and do not enter sums over the flows. The same holds for the
+    marginal costs of the buses in `schattenpreise` ({bus: array}, only
+    with duals in config.yaml).
+    """
+
+    def __init__(self, namen, werte, zeitindex, investitionen,
+                 speicherstand=None, schattenpreise=None):
+        self.namen = list(namen)
+        self.werte = werte
+        self.zeitindex = zeitindex
+        self.investitionen = investitionen
+        self.speicherstand = speicherstand or {}
+        self.schattenpreise = schattenpreise or {}
+        self._zeile = {n: i for i, n in enumerate(self.namen)}
+
+    def __getitem__(self, name):
+        return self.werte[self._zeile[name]]
+
+    def zeilen(self, namen):
+        """Return the row numbers of the given flow names."""
+        return [self._zeile[n] for n in namen]
+
+    def schrittweite(self):
+        """Length of a time step in hours (timeincrement of the energy
+        system), the factor from the flows [kW] to energies [kWh]."""
+        if len(self.zeitindex) < 2:
+            return 1.0
+        return ((self.zeitindex[1] - self.zeitindex[0])
+                / pd.Timedelta(hours=1))
+
+
+def flussmatrix_aus_ergebnissen(string_results, zeitindex=None):
+    """Stack the 'flow' sequences of the oemof results (with string keys)
+    into a `Flussmatrix`."""
+    if zeitindex is None:
+        zeitindex = string_results['Strom', 'Strombedarf']['sequences'].index
+
+    werte = np.zeros((len(FLUESSE), len(zeitindex)))
+    for i, (name, key) in enumerate(FLUESSE):
+        if key in string_results:
+            werte[i] = string_results[key]['sequences']['flow'].to_numpy()
+
+    investitionen = {}
+    for name, key in INVESTITIONEN:
+        if key in string_results:
+            investitionen[name] = float(
+                string_results[key]['scalars']['invest'])
+        else:
+            investitionen[name] = 0.0
+
+    speicherstand = {}
+    for name in SPEICHER:
+        if (name, 'None') in string_results:
+            speicherstand[name] = string_results[name, 'None'][
+                'sequences']['storage_content'].to_numpy(dtype=float)
+
+    return Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex,
+                       investitionen, speicherstand)
+
+
+def _matrix(var, anzahl_zeilen):
+    """All values of a Pyomo variable indexed by (..., timestep) as
+    (anzahl_zeilen x timesteps) array (unset values as 0)."""
+    werte = np.fromiter((0.0 if v.value is None else v.value
+                         for v in var.values()),
+                        dtype=float, count=len(var))
+    return werte.reshape(anzahl_zeilen, -1)
+
+
+def flussmatrix_aus_modell(model):
+    """Read the `Flussmatrix` directly from the variables of the solved
+    `solph.Model` (flow, invest and storage content)."""
+    zeitindex = model.es.timeindex
+
+    # flow ist ueber (FLOWS, TIMESTEPS) indiziert, eine Zeile je Fluss
+    fluesse = _matrix(model.flow, len(model.FLOWS))
+    zeile = {(i.label, o.label): z for z, (i, o) in enumerate(model.FLOWS)}
+    werte = np.zeros((len(FLUESSE), len(zeitindex)))
+    for z, (name, key) in enumerate(FLUESSE):
+        if key in zeile:
+            werte[z] = fluesse[zeile[key]]
+
+    investitionen = {name: float(groesse or 0.0) for name, groesse
+                     in investitionsgroessen(model).items()}
+
+    speicherstand = {}
+    if hasattr(model, 'GenericInvestmentStorageBlock'):
+        block = model.GenericInvestmentStorageBlock
+        inhalt = _matrix(block.storage_content, len(block.INVESTSTORAGES))
+        for z, n in enumerate(block.INVESTSTORAGES):
+            if n.label in SPEICHER:
+                speicherstand[n.label] = inhalt[z]
+
+    return Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex,
+                       investitionen, speicherstand)
+
+
+def schattenpreise_aus_modell(model):
+    """Return the marginal costs of the buses of `BUSSE` [Euro/kWh] per
+    time step ({bus: array}) from the dual values of the bus balances
+    (the model needs the suffix `dual`, see `solph.Model.receive_duals`).
+
+    The duals are divided by the objective weighting of the time step, so
+    the prices of typical periods are per kWh like those of the full time
+    series.
+    """
+    if getattr(model, 'dual', None) is None or not hasattr(model, 'Bus'):
+        return {}
+    eintraege = list(model.Bus.balance.items())
+    schluessel = [k for k, _ in eintraege]
+    busse = sorted(set(g.label for g, _ in schluessel))
+    zeile = {bus: z for z, bus in enumerate(busse)}
+
+    # alle Dualwerte in einem Durchlauf, Position ueber (Bus, Zeitschritt)
+    dual = model.dual
+    werte = np.full((len(busse), len(model.TIMESTEPS)), np.nan)
+    zeilen = np.fromiter((zeile[g.label] for g, _ in schluessel), dtype=int,
+                         count=len(schluessel))
+    spalten = np.fromiter((t for _, t in schluessel), dtype=int,
+                          count=len(schluessel))
+    werte[zeilen, spalten] = np.fromiter(
+        (dual.get(c, np.nan) for _, c in eintraege), dtype=float,
+        count=len(schluessel))
+    gewichte = np.array([model.objective_weighting[t]
+                         for t in model.TIMESTEPS], dtype=float)
+    return {bus: werte[zeile[bus]] / gewichte for bus in BUSSE
+            if bus in zeile}
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rollierender Horizont
+---------------------
+
+Decomposed dispatch for long time horizons (rolling_horizon in config.yaml).
+The investment sizes are taken from a first solve on typical periods. With
+these sizes fixed, the dispatch of the whole time series is solved window by
+window: every window covers horizon_window time steps plus horizon_overlap
+look-ahead steps, only the first horizon_window steps are kept. The content
+of Stromspeicher and Waermespeicher at the end of the kept part is the
+initial content of the next window; the last window ends with the initial
+storage level like the full model.
+
+Windows are coupled only by the storages. If no storage is installed, the
+windows are independent and are solved in parallel (horizon_workers).
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import oemof.solph as solph
+
+from Lehrbeispiel_Modell import fixiere_investitionen
+from Lehrbeispiel_Solver import solve
+
+
+SPEICHER = ['Stromspeicher', 'Waermespeicher']
+
+
+def fenster(anzahl_schritte, laenge, ueberlappung):
+    """Return the windows as (start, kern_ende, ende): time steps
+    start..kern_ende are kept, kern_ende..ende is the look-ahead."""
+    grenzen = []
+    for start in range(0, anzahl_schritte, laenge):
+        kern_ende = min(start + laenge, anzahl_schritte)
+        grenzen.append((start, kern_ende,
+                        min(kern_ende + ueberlappung, anzahl_schritte)))
+    return grenzen
+
+
+def _speicherraender(block, anfangsstand, zielstand):
+    """Fix the storage content before the first time step (`anfangsstand`)
+    and at the last time step (`zielstand`) of a window. None keeps the
+    initial storage level of the model or leaves the end open."""
+    letzter_schritt = block.model().TIMESTEPS[-1]
+    for n in block.INVESTSTORAGES:
+        if anfangsstand is not None:
+            for constraint in (block.init_content_fix,
+                               block.init_content_limit):
+                if n in constraint:
+                    constraint[n].deactivate()
+            block.init_content[n].fix(anfangsstand[n.label])
+        if n in block.balanced_cstr:
+            block.balanced_cstr[n].deactivate()
+        if zielstand is not None:
+            block.storage_content[n, letzter_schritt].fix(zielstand[n.label])
+
+
+def loese_fenster(erstelle, cfg, param_value, data, zeitindex, groessen,
+                  kern, anfangsstand=None, zielstand=None):
+    """Solve the dispatch of one window with fixed investment sizes.
+
+    `data` and `zeitindex` cover the window including the look-ahead,
+    `erstelle` builds the model (`create_model`). Returns the results (string
+    keys) of the first `kern` time steps and the storage contents at the end
+    of them.
+    """
+    energysystem, model = erstelle(param_value, data, zeitindex)
+    fixiere_investitionen(model, groessen)
+    if hasattr(model, 'GenericInvestmentStorageBlock'):
+        _speicherraender(model.GenericInvestmentStorageBlock, anfangsstand,
+                         zielstand)
+    solve(model, cfg)
+
+    ergebnisse = solph.views.convert_keys_to_strings(
+        solph.processing.results(model))
+    teil = {}
+    for key, werte in ergebnisse.items():
+        teil[key] = {'scalars': werte['scalars'],
+                     'sequences': werte['sequences'].iloc[:kern]}
+    endstand = {}
+    for key, werte in teil.items():
+        if key[0] in SPEICHER and key[1] == 'None':
+            endstand[key[0]] = werte['sequences']['storage_content'].iloc[-1]
+    return teil, endstand
+
+
+def rollierender_horizont(erstelle, cfg, param_value, data, date_time_index,
+                          groessen):
+    """Solve the dispatch of the full time series in windows and return the
+    results {key: {'scalars', 'sequences'}} with string keys."""
+    laenge = cfg.get('horizon_window', 168)
+    ueberlappung = cfg.get('horizon_overlap', 24)
+    grenzen = fenster(len(date_time_index), laenge, ueberlappung)
+
+    # Zielstand am Ende des Zeitraums wie im Gesamtmodell (balanced)
+    zielstand = {s: param_value['isl_' + s] * groessen.get(s, 0.0)
+                 for s in SPEICHER}
+    unabhaengig = all(groessen.get(s, 0.0) <= 1e-6 for s in SPEICHER)
+    number_of_workers = cfg.get('horizon_workers', 1)
+    logging.info('Rolling horizon: {0} windows of {1} + {2} time '
+                 'steps.'.format(len(grenzen), laenge, ueberlappung))
+
+    def argumente(nummer, anfangsstand):
+        start, kern_ende, ende = grenzen[nummer]
+        daten = {k: np.asarray(v)[start:ende] for k, v in data.items()}
+        letztes = nummer == len(grenzen) - 1
+        return (erstelle, cfg, param_value, daten,
+                date_time_index[start:ende], groessen, kern_ende - start,
+                anfangsstand, zielstand if letztes else None)
+
+    if unabhaengig and number_of_workers > 1 and len(grenzen) > 1:
+        # ohne Speicher sind die Fenster unabhaengig voneinander
+        leer = {s: 0.0 for s in SPEICHER}
+        with ProcessPoolExecutor(max_workers=number_of_workers) as pool:
+            futures = [pool.submit(loese_fenster,
+                                   *argumente(i, leer if i > 0 else None))
+                       for i in range(len(grenzen))]
+            teile = [future.result()[0] for future in futures]
+    else:
+        teile = []
+        anfangsstand = None
+        for i in range(len(grenzen)):
+            teil, anfangsstand = loese_fenster(*argumente(i, anfangsstand))
+            teile.append(teil)
+            logging.info('Window {0}/{1} solved.'.format(i + 1, len(grenzen)))
+
+    return {key: {'scalars': teile[0][key]['scalars'],
+                  'sequences': pd.concat([t[key]['sequences'] for t in teile])}
+            for key in teile[0]}
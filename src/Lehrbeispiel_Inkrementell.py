@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Inkrementelle Laeufe
+--------------------
+
+Content keys for incremental runs (incremental in config.yaml). The key of
+a solve is the SHA-256 hash of everything the results depend on: the
+effective design parameters of the team, the input time series, the model
+settings of config.yaml, the component template and the source code of the
+model modules (plus the versions of oemof.solph and Pyomo). It is stored
+in the results store of the team (results_format: 'store'); a team with an
+unchanged key is not solved again, its stored results are used.
+
+The evaluation has its own key (key of the results, design parameters,
+settings of the evaluation and its source code). It is written to
+results/results_<n>/auswertung.json after the plots and CSV files, which
+are only written again if the key changed.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import hashlib
+import json
+import logging
+import os
+
+import oemof.solph as solph
+from pyomo.version import version as pyomo_version
+
+from Lehrbeispiel_Daten import abs_path, time_series_hash
+from Lehrbeispiel_Komponenten import VORLAGE
+import Lehrbeispiel_Ablage as ablage
+
+
+# Quelltexte, von denen die Modellergebnisse abhaengen
+MODELLCODE = ['Lehrbeispiel.py', 'Lehrbeispiel_Modell.py',
+              'Lehrbeispiel_Aggregation.py', 'Lehrbeispiel_Horizont.py',
+              'Lehrbeispiel_Solver.py', 'Lehrbeispiel_Ergebnisse.py',
+              'Lehrbeispiel_Ablage.py', 'Lehrbeispiel_Kennzahlen.py',
+              'Lehrbeispiel_Technologien.py', 'Lehrbeispiel_Komponenten.py']
+
+# Quelltexte der Auswertung
+AUSWERTUNGSCODE = ['Lehrbeispiel_Auswertung.py',
+                   'Lehrbeispiel_Kennzahlen.py',
+                   'Lehrbeispiel_Technologien.py',
+                   'Lehrbeispiel_Zeitfenster.py',
+                   'Lehrbeispiel_Detailstufen.py',
+                   'Lehrbeispiel_Dauerlinien.py',
+                   'Lehrbeispiel_Speicher.py', 'Lehrbeispiel_Plots.py']
+
+# Einstellungen in config.yaml ohne Einfluss auf die Modellergebnisse
+# (Teamdateien und Zeitreihe gehen ueber ihren Inhalt ein)
+OHNE_EINFLUSS = ['run_model', 'display_results', 'solver_verbose',
+                 'number_of_workers', 'in_memory_results', 'dump_results',
+                 'results_format', 'profiling', 'incremental', 'export_csv',
+                 'plots', 'plot_format', 'plot_dpi', 'plot_workers',
+                 'comparison_report', 'plot_resolution', 'plot_max_points',
+                 'duration_curves', 'storage_analysis',
+                 'number_of_teams', 'team_names',
+                 'design_parameters_file_name', 'time_series_file_name',
+                 'seasonal_windows']
+
+# Einstellungen der Auswertung
+AUSWERTUNG = ['export_csv', 'plots', 'plot_format', 'plot_dpi',
+              'plot_resolution', 'plot_max_points', 'duration_curves',
+              'storage_analysis', 'seasonal_windows', 'team_names']
+
+
+def _hash(*teile):
+    sha = hashlib.sha256()
+    for teil in teile:
+        sha.update(json.dumps(teil, sort_keys=True, default=str).encode())
+    return sha.hexdigest()
+
+
+def _quelltext(dateien):
+    sha = hashlib.sha256()
+    verzeichnis = os.path.dirname(os.path.abspath(__file__))
+    for datei in dateien:
+        # absolute Pfade (Komponentenvorlage) bleiben erhalten
+        with open(os.path.join(verzeichnis, datei), 'rb') as f:
+            sha.update(f.read())
+    return sha.hexdigest()
+
+
+def _parameter(param_value):
+    return [[str(k), repr(v)] for k, v in param_value.items()]
+
+
+def modell_schluessel(cfg, param_value):
+    """Return the content key of the solve of one team."""
+    einstellungen = {k: v for k, v in cfg.items() if k not in OHNE_EINFLUSS}
+    return _hash(_parameter(param_value), time_series_hash(cfg),
+                 einstellungen, _quelltext(MODELLCODE + [VORLAGE]),
+                 solph.__version__, pyomo_version)
+
+
+def gespeicherte_ergebnisse(team_number, schluessel):
+    """Return the stored results of a team if they were computed with the
+    key `schluessel`, else None."""
+    if not ablage.vorhanden(team_number):
+        return None
+    kopf = ablage.lade_kopf(team_number)
+    if kopf.get('schluessel') != schluessel:
+        return None
+    return {'flussmatrix': ablage.lade(team_number),
+            'meta': kopf['meta'],
+            'schluessel': schluessel}
+
+
+def auswertung_schluessel(cfg, param_value, ergebnis_schluessel):
+    """Return the content key of the evaluation of one team (None if the
+    key of the results is unknown)."""
+    if ergebnis_schluessel is None:
+        return None
+    einstellungen = {k: cfg.get(k) for k in AUSWERTUNG}
+    return _hash(ergebnis_schluessel, _parameter(param_value), einstellungen,
+                 _quelltext(AUSWERTUNGSCODE))
+
+
+def _auswertung_pfad(team_number):
+    return os.path.join(abs_path, 'results',
+                        'results_{0}'.format(team_number+1), 'auswertung.json')
+
+
+def auswertung_aktuell(team_number, schluessel):
+    """Return True if the plots and CSV files of the team were written with
+    the key `schluessel`."""
+    if schluessel is None or not os.path.exists(_auswertung_pfad(team_number)):
+        return False
+    with open(_auswertung_pfad(team_number)) as f:
+        aktuell = json.load(f).get('schluessel') == schluessel
+    if aktuell:
+        logging.info('Results of team {0} unchanged, keep the plots and CSV '
+                     'files.'.format(team_number+1))
+    return aktuell
+
+
+def merke_auswertung(team_number, schluessel):
+    """Store the key of the written evaluation."""
+    if schluessel is None:
+        return
+    with open(_auswertung_pfad(team_number), 'w') as f:
+        json.dump({'schluessel': schluessel}, f)
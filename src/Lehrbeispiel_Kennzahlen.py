@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""
+Kennzahlen
+----------
+
+Evaluation of the key performance indicators (KPI) of one team. All flow
+totals are computed with one reduction over the `Flussmatrix` (times the
+length of a time step, so quarter-hourly series give the same energies as
+hourly ones), every other KPI is derived from these totals. The resulting
+`Kennzahlen` record is read by the CSV writer as well as by the console
+output.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+from dataclasses import dataclass
+from typing import Optional
+
+from Lehrbeispiel_Technologien import kostenaufteilung
+
+
+@dataclass
+class Kennzahlen:
+    """KPI record of one team (energies in kWh/a, emissions in g/a,
+    costs in Euro/a)."""
+
+    # Investitionsgroessen [kW bzw. kWh]
+    PV_Invest_kW: float
+    PV_Invest_m2: float
+    Solarthermie_Invest_kW: float
+    Solarthermie_Invest_m2: float
+    Gaskessel_Invest: float
+    BHKW_Invest: float
+    Waermepumpe_Invest: float
+    Stromspeicher_Invest: float
+    Waermespeicher_Invest: float
+
+    # Energiemengen
+    Strombedarf: float
+    Stromueberschuss: float
+    PV_el: float
+    BHKW_el: float
+    Strombezug: float
+    Waermebedarf: float
+    Waermeueberschuss: float
+    Solarthermie_th: float
+    Gaskessel_th: float
+    BHKW_th: float
+    Waermepumpe_th: float
+    Waermebezug: float
+
+    # CO2-Emissionen
+    em_co2: float
+    em_Gaskessel: float
+    em_BHKW: float
+    em_Strombezug: float
+    em_Waermebezug: float
+
+    # Kosten
+    annuity_PV: float
+    annuity_Solarthermie: float
+    annuity_Gaskessel: float
+    annuity_BHKW: float
+    annuity_Waermepumpe: float
+    annuity_Stromspeicher: float
+    annuity_Waermespeicher: float
+    total_annuity: float
+    vc_Erdgas: float
+    vc_CO2: float
+    vc_Strombezug: float
+    vc_Waermebezug: float
+    var_costs_es: float
+    sum_costs: float
+
+    # Deckungsgrade
+    Verhaeltnis_el: float
+    Verhaeltnis_th: float
+    Deckungsgrad: float
+
+    # Speicher (None, wenn der Speicher nicht installiert ist)
+    Vollladezyklenzahl_Stromspeicher: Optional[float]
+    Verhaeltnis_Ausspeichern_Bedarf_Stromspeicher: Optional[float]
+    Vollladezyklenzahl_Waermespeicher: Optional[float]
+    Verhaeltnis_Ausspeichern_Bedarf_Waermespeicher: Optional[float]
+
+    def tabelle(self):
+        """Return the values in the order of Auswertungsergebnisse_Text.csv
+        (rounded as in the result files, '' for the headings)."""
+        def speicher(wert, text):
+            return text if wert is None else wert
+
+        kein_el = 'Kein Stromspeicher installiert.'
+        kein_th = 'Kein Waermespeicher installiert.'
+        return [
+            round(self.sum_costs / 1e3, 1),
+            round(self.em_co2 / 1e6, 1),
+            round(self.Deckungsgrad, 4),
+            round(self.PV_Invest_kW, 1),
+            round(self.PV_Invest_m2, 1),
+            round(self.Solarthermie_Invest_kW, 1),
+            round(self.Solarthermie_Invest_m2, 1),
+            round(self.Gaskessel_Invest, 1),
+            round(self.BHKW_Invest, 1),
+            round(self.Waermepumpe_Invest, 1),
+            round(self.Stromspeicher_Invest, 4),
+            round(self.Waermespeicher_Invest, 1),
+            '',
+            round(self.Strombedarf / 1000, 1),
+            round(self.Stromueberschuss / 1000, 1),
+            round((self.PV_el + self.BHKW_el + self.Strombezug) / 1000, 1),
+            round(self.PV_el / 1000, 1),
+            round(self.BHKW_el / 1000, 1),
+            round(self.Strombezug / 1000, 1),
+            '',
+            round(self.Waermebedarf / 1000, 1),
+            round(self.Waermeueberschuss / 1000, 1),
+            round((self.Solarthermie_th + self.Gaskessel_th + self.BHKW_th
+                   + self.Waermepumpe_th + self.Waermebezug) / 1000, 1),
+            round(self.Solarthermie_th / 1000, 1),
+            round(self.Gaskessel_th / 1000, 1),
+            round(self.BHKW_th / 1000, 1),
+            round(self.Waermepumpe_th / 1000, 1),
+            round(self.Waermebezug / 1000, 1),
+            '',
+            speicher(self.Vollladezyklenzahl_Stromspeicher, kein_el),
+            speicher(self.Verhaeltnis_Ausspeichern_Bedarf_Stromspeicher,
+                     kein_el),
+            speicher(self.Vollladezyklenzahl_Waermespeicher, kein_th),
+            speicher(self.Verhaeltnis_Ausspeichern_Bedarf_Waermespeicher,
+                     kein_th),
+            '',
+            round(self.em_Gaskessel / 1e6, 1),
+            round(self.em_BHKW / 1e6, 1),
+            round(self.em_Strombezug / 1e6, 1),
+            round(self.em_Waermebezug / 1e6, 1),
+            '',
+            round(self.total_annuity / 1e3, 1),
+            round(self.annuity_PV / 1e3, 1),
+            round(self.annuity_Solarthermie / 1e3, 1),
+            round(self.annuity_Gaskessel / 1e3, 1),
+            round(self.annuity_BHKW / 1e3, 1),
+            round(self.annuity_Waermepumpe / 1e3, 1),
+            round(self.annuity_Stromspeicher / 1e3, 1),
+            round(self.annuity_Waermespeicher / 1e3, 1),
+            round(self.var_costs_es / 1e3, 1),
+            round(self.vc_Erdgas / 1e3, 1),
+            round(self.vc_CO2 / 1e3, 1),
+            round(self.vc_Strombezug / 1e3, 1),
+            round(self.vc_Waermebezug / 1e3, 1),
+            '',
+            self.Verhaeltnis_el,
+            self.Verhaeltnis_th,
+        ]
+
+
+def berechne_kennzahlen(flussmatrix, param_value):
+    """Compute the `Kennzahlen` of one team from its `Flussmatrix`."""
+    # Alle Jahressummen in einem Schritt, Leistung [kW] mal Schrittweite [h]
+    summe = dict(zip(flussmatrix.namen, flussmatrix.werte.sum(axis=1)
+                     * flussmatrix.schrittweite()))
+    invest = flussmatrix.investitionen
+
+    # Annuitaeten der Investitionskosten aller Technologien
+    annuity = kostenaufteilung(invest, param_value)['annuitaet']
+    total_annuity = annuity.sum()
+
+    # variable Kosten
+    vc_Erdgas = summe['Gasnetz'] * param_value['vc_gas']
+    vc_CO2 = summe['Gasnetz'] * param_value['vc_CO2']
+    vc_Strombezug = summe['Strombezug'] * param_value['vc_el']
+    vc_Waermebezug = summe['Waermebezug'] * param_value['vc_th']
+    var_costs_es = vc_Erdgas + vc_CO2 + vc_Strombezug + vc_Waermebezug
+
+    # CO2-Emissionen (kWh/a)*(g/kWh)
+    em_Strombezug = summe['Strombezug'] * param_value['emission_el']
+    em_Waermebezug = summe['Waermebezug'] * param_value['emission_th']
+    em_co2 = (summe['Gasnetz'] * param_value['emission_gas']
+              + em_Strombezug + em_Waermebezug)
+
+    # Verhaeltnis zwischen Bezug und Gesamtbedarf
+    Verhaeltnis_el = ((summe['Strombedarf'] - summe['Strombezug'])
+                      / summe['Strombedarf'])
+    Verhaeltnis_th = ((summe['Waermebedarf'] - summe['Waermebezug'])
+                      / summe['Waermebedarf'])
+
+    # Speicher
+    if invest['Stromspeicher'] > 0:
+        zyklen_el = summe['Stromspeicher_in'] / invest['Stromspeicher']
+        anteil_el = summe['Stromspeicher_out'] / summe['Strombedarf']
+    else:
+        zyklen_el = anteil_el = None
+    if invest['Waermespeicher'] > 0:
+        zyklen_th = summe['Waermespeicher_in'] / invest['Waermespeicher']
+        anteil_th = summe['Waermespeicher_out'] / summe['Waermebedarf']
+    else:
+        zyklen_th = anteil_th = None
+
+    return Kennzahlen(
+        PV_Invest_kW=invest['PV'],
+        PV_Invest_m2=invest['PV'] / (1 * param_value['cf_PV']),
+        Solarthermie_Invest_kW=invest['Solarthermie'],
+        Solarthermie_Invest_m2=(invest['Solarthermie']
+                                / (1 * param_value['cf_Sol'])),
+        Gaskessel_Invest=invest['Gaskessel'],
+        BHKW_Invest=invest['BHKW'],
+        Waermepumpe_Invest=invest['Waermepumpe'],
+        Stromspeicher_Invest=invest['Stromspeicher'],
+        Waermespeicher_Invest=invest['Waermespeicher'],
+        Strombedarf=summe['Strombedarf'],
+        Stromueberschuss=summe['Stromueberschuss'],
+        PV_el=summe['PV'],
+        BHKW_el=summe['BHKW_el'],
+        Strombezug=summe['Strombezug'],
+        Waermebedarf=summe['Waermebedarf'],
+        Waermeueberschuss=summe['Waermeueberschuss'],
+        Solarthermie_th=summe['Solarthermie'],
+        Gaskessel_th=summe['Gaskessel'],
+        BHKW_th=summe['BHKW_th'],
+        Waermepumpe_th=summe['Waermepumpe_th'],
+        Waermebezug=summe['Waermebezug'],
+        em_co2=em_co2,
+        em_Gaskessel=summe['Gaskessel_gas'] * param_value['emission_gas'],
+        em_BHKW=summe['BHKW_gas'] * param_value['emission_gas'],
+        em_Strombezug=em_Strombezug,
+        em_Waermebezug=em_Waermebezug,
+        annuity_PV=annuity['PV'],
+        annuity_Solarthermie=annuity['Solarthermie'],
+        annuity_Gaskessel=annuity['Gaskessel'],
+        annuity_BHKW=annuity['BHKW'],
+        annuity_Waermepumpe=annuity['Waermepumpe'],
+        annuity_Stromspeicher=annuity['Stromspeicher'],
+        annuity_Waermespeicher=annuity['Waermespeicher'],
+        total_annuity=total_annuity,
+        vc_Erdgas=vc_Erdgas,
+        vc_CO2=vc_CO2,
+        vc_Strombezug=vc_Strombezug,
+        vc_Waermebezug=vc_Waermebezug,
+        var_costs_es=var_costs_es,
+        sum_costs=var_costs_es + total_annuity,
+        Verhaeltnis_el=Verhaeltnis_el,
+        Verhaeltnis_th=Verhaeltnis_th,
+        Deckungsgrad=(Verhaeltnis_el + Verhaeltnis_th) / 2,
+        Vollladezyklenzahl_Stromspeicher=zyklen_el,
+        Verhaeltnis_Ausspeichern_Bedarf_Stromspeicher=anteil_el,
+        Vollladezyklenzahl_Waermespeicher=zyklen_th,
+        Verhaeltnis_Ausspeichern_Bedarf_Waermespeicher=anteil_th,
+    )
+
+
+def drucke_kennzahlen(k):
+    """Print the main KPI of one team to the console."""
+    print("Die Größe der PV-Anlage beträgt:  {:.2f}"
+          .format(k.PV_Invest_kW), "kW")
+    print("Die Größe der Solarthermieanlage beträgt:  {:.2f}"
+          .format(k.Solarthermie_Invest_kW), "kW")
+    print("Die Größe des Gaskessels beträgt:  {:.2f}"
+          .format(k.Gaskessel_Invest), "kW")
+    print("Die Größe des BHKW's beträgt:  {:.2f}"
+          .format(k.BHKW_Invest), "kW")
+    print("Die Größe der Wärmepumpe beträgt:  {:.2f}"
+          .format(k.Waermepumpe_Invest), "kW")
+    print("Die Größe des Stromspeichers beträgt:  {:.2f}"
+          .format(k.Stromspeicher_Invest), "kWh")
+    print("Die Größe des Wärmespeichers beträgt:  {:.2f}"
+          .format(k.Waermespeicher_Invest), "kWh")
+    print("CO2-Emissionen: {:.2f}".format(k.em_co2/1e6), "t/a")
+    print("Gesamtenergiekosten pro Jahr: {:.2f}".format(
+         (k.sum_costs) / 1e6), "Mio. €/a")
+    print("Elektrischer Deckungsgrad: {:.5f}"
+          .format(k.Verhaeltnis_el))
+    print("Thermischer Deckungsgrad: {:.5f}"
+          .format(k.Verhaeltnis_th))
+    print("Der Gesamtdeckungsgrad beträgt: {:.5f}"
+          .format(k.Deckungsgrad))
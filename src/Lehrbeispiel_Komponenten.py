@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+"""
+Komponentenvorlage
+------------------
+
+Builds the buses and components of the energy system from the declarative
+template experiment_config/components.yaml (one entry per component with
+its type, flows and the names of its design parameters).
+
+The template is read and compiled once per file version: every value is
+turned into a small function of the design parameters. Building the system
+of a team or scenario then only evaluates these functions and creates the
+oemof objects, so many scenarios share one parsed template. Components are
+pruned before they are created: a component whose guard (`active`) is not
+positive or whose investment technology has a maximum size of 0 is not part
+of the energy system, so the LP contains no variables for it.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+from collections import namedtuple
+from functools import reduce
+import operator
+import os
+
+import numpy as np
+import oemof.solph as solph
+import yaml
+
+from Lehrbeispiel_Daten import abs_path, load_file
+
+
+VORLAGE = os.path.join(abs_path, 'experiment_config', 'components.yaml')
+
+# Komponententyp der Vorlage: oemof-Klasse
+TYPEN = [('source', solph.Source),
+         ('sink', solph.Sink),
+         ('transformer', solph.Transformer),
+         ('storage', solph.components.GenericStorage)]
+
+Vorlage = namedtuple('Vorlage', ['busse', 'komponenten'])
+
+Komponente = namedtuple('Komponente', ['label', 'klasse', 'aktiv', 'inputs',
+                                       'outputs', 'conversion_factors',
+                                       'investment', 'werte'])
+
+Fluss = namedtuple('Fluss', ['werte', 'fix', 'investment'])
+
+
+def _wert(spec):
+    """Compile a value of the template to a function of the design
+    parameters."""
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        wert = float(spec)
+        return lambda p: wert
+    if isinstance(spec, str):
+        return lambda p: p[spec]
+    if isinstance(spec, list) and spec:
+        faktoren = [_wert(s) for s in spec]
+        return lambda p: reduce(operator.mul, [f(p) for f in faktoren])
+    if isinstance(spec, dict) and len(spec) == 1:
+        (art, teile), = spec.items()
+        teile = [_wert(s) for s in teile]
+        if art == 'sum':
+            return lambda p: sum(f(p) for f in teile)
+        if art == 'difference' and len(teile) == 2:
+            a, b = teile
+            return lambda p: a(p) - b(p)
+    raise ValueError('Invalid value {0!r} in the component template'.format(
+        spec))
+
+
+def _fix(spec):
+    """Compile a fixed flow profile (value or {series, factor}) to a
+    function of the design parameters and the time series."""
+    if not isinstance(spec, dict):
+        wert = _wert(spec)
+        return lambda p, data: wert(p)
+    # Faktoren nacheinander anwenden wie data[...]*0.001*cf_PV
+    faktor = spec.get('factor', [])
+    faktoren = [_wert(s) for s in (faktor if isinstance(faktor, list)
+                                   else [faktor])]
+    spalte = spec['series']
+
+    def profil(p, data):
+        werte = data[spalte]
+        for f in faktoren:
+            werte = werte * f(p)
+        return werte
+    return profil
+
+
+def _fluss(spec):
+    spec = dict(spec or {})
+    fix = spec.pop('fix', None)
+    return Fluss(werte={k: _wert(v) for k, v in spec.items()
+                        if k != 'investment'},
+                 fix=None if fix is None else _fix(fix),
+                 investment=spec.get('investment'))
+
+
+def _komponente(spec):
+    spec = dict(spec)
+    typen = dict(TYPEN)
+    if spec.get('type') not in typen:
+        raise ValueError('Unknown type {0!r} of component {1!r}'.format(
+            spec.get('type'), spec.get('label')))
+    aktiv = spec.pop('active', None)
+    komponente = Komponente(
+        label=spec.pop('label'),
+        klasse=typen[spec.pop('type')],
+        aktiv=None if aktiv is None else _wert(aktiv),
+        inputs=[(b, _fluss(f)) for b, f in spec.pop('inputs', {}).items()],
+        outputs=[(b, _fluss(f)) for b, f in spec.pop('outputs', {}).items()],
+        conversion_factors=[(b, _wert(w)) for b, w in
+                            spec.pop('conversion_factors', {}).items()],
+        investment=spec.pop('investment', None),
+        # uebrige Argumente der Komponente, z.B. loss_rate
+        werte={k: _wert(v) for k, v in spec.items()})
+    return komponente
+
+
+def _lies_vorlage(file_path):
+    with open(file_path, 'r') as ymlfile:
+        spec = yaml.load(ymlfile, Loader=yaml.CLoader)
+    return Vorlage(busse=list(spec['buses']),
+                   komponenten=[_komponente(k) for k in spec['components']])
+
+
+def lade_vorlage(file_path=VORLAGE):
+    """Return the compiled template (parsed again only if the file
+    changed)."""
+    return load_file(file_path, _lies_vorlage)
+
+
+def technologien(komponente):
+    """Return the investment technologies of a component."""
+    namen = [f.investment for _, f in komponente.inputs + komponente.outputs]
+    return [n for n in namen + [komponente.investment] if n is not None]
+
+
+def wird_gebaut(komponente, param_value, technik):
+    """Return True if the component is part of the energy system of the
+    design parameters (guard positive, maximum size of its technologies
+    greater than 0)."""
+    if komponente.aktiv is not None and not komponente.aktiv(param_value) > 0:
+        return False
+    return all(technik.loc[t, 'max'] > 0 for t in technologien(komponente))
+
+
+def _investment(technik, technologie):
+    zeile = technik.loc[technologie]
+    kwargs = {'ep_costs': zeile['epc'], 'minimum': zeile['min']}
+    if np.isfinite(zeile['max']):
+        kwargs['maximum'] = zeile['max']
+    return solph.Investment(**kwargs)
+
+
+def _flow(fluss, param_value, data, technik):
+    kwargs = {k: f(param_value) for k, f in fluss.werte.items()}
+    if fluss.fix is not None:
+        kwargs['fix'] = fluss.fix(param_value, data)
+    if fluss.investment is not None:
+        kwargs['investment'] = _investment(technik, fluss.investment)
+    return solph.Flow(**kwargs)
+
+
+def baue(energysystem, vorlage, param_value, data, technik):
+    """Add buses and components of the template to `energysystem`.
+
+    `technik` is the technology table of the team
+    (`Lehrbeispiel_Technologien.tabelle`) with costs and size limits.
+    Returns the buses {label: bus}.
+    """
+    busse = {label: solph.Bus(label=label) for label in vorlage.busse}
+    energysystem.add(*busse.values())
+
+    for komponente in vorlage.komponenten:
+        if not wird_gebaut(komponente, param_value, technik):
+            continue
+        kwargs = {k: f(param_value) for k, f in komponente.werte.items()}
+        if komponente.inputs:
+            kwargs['inputs'] = {busse[b]: _flow(f, param_value, data, technik)
+                                for b, f in komponente.inputs}
+        if komponente.outputs:
+            kwargs['outputs'] = {busse[b]: _flow(f, param_value, data,
+                                                 technik)
+                                 for b, f in komponente.outputs}
+        if komponente.conversion_factors:
+            kwargs['conversion_factors'] = {
+                busse[b]: f(param_value)
+                for b, f in komponente.conversion_factors}
+        if komponente.investment is not None:
+            kwargs['investment'] = _investment(technik, komponente.investment)
+        energysystem.add(komponente.klasse(label=komponente.label, **kwargs))
+    return busse
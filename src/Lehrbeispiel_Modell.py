@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+Wiederverwendbares Modell
+-------------------------
+
+Reuse of a built `solph.Model` for scenarios that differ only in numbers
+(reuse_model in config.yaml). The costs in the objective and the collector
+area are mutable Pyomo parameters, the investment limits are variable
+bounds and the demand is set by the fixed flow values. A new scenario only
+updates these values before the next solve.
+
+All other design parameters (efficiencies, storage losses, which components
+exist) change the structure of the model and are part of the `signatur`.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import numpy as np
+import pyomo.environ as po
+
+from Lehrbeispiel_Technologien import NAMEN, spalten, periodische_kosten
+from Lehrbeispiel_Komponenten import lade_vorlage
+
+
+# Parameter, die Koeffizienten der Nebenbedingungen bestimmen
+STRUKTUR = ['cf_PV', 'cf_Sol', 'cf_Gaskessel', 'cf_BHKW_el', 'COP_Waermepumpe',
+            'cf_Stromspeicher_ein', 'cf_Stromspeicher_aus',
+            'cf_Waermespeicher_ein', 'cf_Waermespeicher_aus',
+            'lr_Stromspeicher', 'isl_Stromspeicher',
+            'lr_Waermespeicher', 'isl_Waermespeicher']
+
+# Parameter, von denen abhaengt, ob eine Komponente gebaut wird (> 0)
+KOMPONENTEN = ['A_Kollektor_gesamt', 'max_Gaskessel', 'max_BHKW',
+               'max_Waermepumpe', 'max_Stromspeicher', 'max_Waermespeicher']
+
+# Einstellungen in config.yaml, die Zeitindex und Zeitreihen bestimmen
+EINSTELLUNGEN = ['debug', 'number_of_time_steps', 'start_date',
+                 'time_step_frequency', 'time_series_file_name',
+                 'typical_periods', 'time_steps_per_period',
+                 'clustering_method', 'peak_periods']
+
+# Quelle: (Bus, Kostenparameter)
+VARIABLE_KOSTEN = [('Gasnetz', 'Erdgas', ['vc_gas', 'vc_CO2']),
+                   ('Strombezug', 'Strom', ['vc_el']),
+                   ('Waermebezug', 'Waerme', ['vc_th'])]
+
+# (Bus, Senke, Jahresbedarf)
+BEDARF = [('Strom', 'Strombedarf', 'W_el'),
+          ('Waerme', 'Waermebedarf', 'W_th')]
+
+
+def signatur(cfg, param_value, data):
+    """Return a key that is equal for two scenarios if the model of one can
+    be reused for the other. `data` is the (cached) time series dictionary,
+    it is the same object as long as the input file is unchanged, as is the
+    compiled component template."""
+    return (tuple(cfg.get(k) for k in EINSTELLUNGEN),
+            tuple(float(param_value[k]) for k in STRUKTUR),
+            tuple(bool(param_value[k] > 0) for k in KOMPONENTEN),
+            id(data), id(lade_vorlage()))
+
+
+def _fluesse(model):
+    return {(i.label, o.label): (i, o) for i, o in model.flows}
+
+
+def investition(model, technologie):
+    """Return the investment variable of a technology (None if the
+    technology is not part of the model)."""
+    if hasattr(model, 'InvestmentFlow'):
+        for i, o in model.InvestmentFlow.invest:
+            if i.label == technologie:
+                return model.InvestmentFlow.invest[i, o]
+    if hasattr(model, 'GenericInvestmentStorageBlock'):
+        for n in model.GenericInvestmentStorageBlock.invest:
+            if n.label == technologie:
+                return model.GenericInvestmentStorageBlock.invest[n]
+    return None
+
+
+def investitionsgroessen(model):
+    """Return the optimised investment sizes {technology: size} of a solved
+    model (0 for technologies that are not part of the model)."""
+    groessen = {}
+    for technologie in NAMEN:
+        invest = investition(model, technologie)
+        groessen[technologie] = 0.0 if invest is None else invest.value
+    return groessen
+
+
+def fixiere_investitionen(model, groessen):
+    """Fix the investment variables to the given sizes (dispatch only) and
+    deactivate the collector area limit, which contains only these
+    variables."""
+    for technologie, groesse in groessen.items():
+        invest = investition(model, technologie)
+        if invest is not None:
+            invest.fix(groesse)
+    if hasattr(model, 'MyBlock'):
+        model.MyBlock.collector_area.deactivate()
+
+
+def parametrisiere(model):
+    """Replace the objective and the collector area limit of a freshly built
+    model by expressions with mutable parameters (block `Szenario`)."""
+    szenario = po.Block()
+    model.add_component('Szenario', szenario)
+    szenario.vc = po.Param([q for q, _, _ in VARIABLE_KOSTEN],
+                           mutable=True, initialize=0)
+    szenario.epc = po.Param(NAMEN, mutable=True, initialize=0)
+    szenario.A_Kollektor_gesamt = po.Param(mutable=True, initialize=0)
+    # Jahresbedarf, mit dem die Bedarfsfluesse zuletzt fixiert wurden
+    fluesse = _fluesse(model)
+    szenario.bedarf = po.Param(
+        [senke for _, senke, _ in BEDARF], mutable=True,
+        initialize={senke: model.flows[fluesse[bus, senke]].nominal_value
+                    for bus, senke, _ in BEDARF})
+
+    # gleiche Kostenterme wie das oemof-Modell, aber mit Parametern
+    kosten = 0
+    for quelle, bus, _ in VARIABLE_KOSTEN:
+        i, o = fluesse[quelle, bus]
+        kosten += szenario.vc[quelle] * sum(
+            model.flow[i, o, t] * model.objective_weighting[t]
+            for t in model.TIMESTEPS)
+    for technologie in NAMEN:
+        invest = investition(model, technologie)
+        if invest is not None:
+            kosten += szenario.epc[technologie] * invest
+    model.objective.set_value(kosten)
+
+    if hasattr(model, 'MyBlock'):
+        flaeche = model.MyBlock.collector_area
+        flaeche.set_value(flaeche.body <= szenario.A_Kollektor_gesamt)
+
+
+def aktualisiere(model, param_value):
+    """Set costs, investment limits, collector area and demand of the model
+    (built with `parametrisiere`) to the values of `param_value`.
+
+    Returns the changed variables and constraints (besides the objective)
+    for persistent solvers. Only values that differ from the previous
+    scenario are set and returned, the demand profiles (one entry per time
+    step) only if the annual demand changed.
+    """
+    aenderungen = {'variablen': [], 'nebenbedingungen': []}
+    szenario = model.Szenario
+    for quelle, _, parameter in VARIABLE_KOSTEN:
+        szenario.vc[quelle] = sum(param_value[k] for k in parameter)
+    # Kosten und Grenzen aller Technologien aus der Technologietabelle
+    epc = periodische_kosten(param_value)
+    tabelle = spalten(param_value)
+    for i, technologie in enumerate(NAMEN):
+        szenario.epc[technologie] = epc[technologie]
+        invest = investition(model, technologie)
+        if invest is not None:
+            maximum = tabelle['max'][i]
+            grenzen = (tabelle['min'][i],
+                       None if np.isinf(maximum) else maximum)
+            if (invest.lb, invest.ub) != grenzen:
+                invest.setlb(grenzen[0])
+                invest.setub(grenzen[1])
+                aenderungen['variablen'].append(invest)
+    if po.value(szenario.A_Kollektor_gesamt) != param_value[
+            'A_Kollektor_gesamt']:
+        szenario.A_Kollektor_gesamt = param_value['A_Kollektor_gesamt']
+        if hasattr(model, 'MyBlock'):
+            aenderungen['nebenbedingungen'].append(
+                model.MyBlock.collector_area)
+
+    # Bedarfsprofile nur bei geaendertem Jahresbedarf neu fixieren
+    fluesse = _fluesse(model)
+    for bus, senke, bedarf in BEDARF:
+        if po.value(szenario.bedarf[senke]) == param_value[bedarf]:
+            continue
+        szenario.bedarf[senke] = param_value[bedarf]
+        i, o = fluesse[bus, senke]
+        profil = model.flows[i, o].fix
+        for t in model.TIMESTEPS:
+            model.flow[i, o, t].fix(profil[t] * param_value[bedarf])
+            aenderungen['variablen'].append(model.flow[i, o, t])
+            aenderungen['nebenbedingungen'].append(model.Bus.balance[i, t])
+    return aenderungen
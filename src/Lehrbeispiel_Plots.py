@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+Grafiken
+--------
+
+Rendering of the time series plots. Every plot is drawn on its own
+matplotlib Figure with the non-interactive Agg canvas (no pyplot state, no
+display needed) and released right after saving. The plots of a team can
+be rendered concurrently in a process pool.
+
+Optional:
+
+    pip install matplotlib
+
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+except ImportError:
+    Figure = None
+
+
+# Farben je Komponente/Technologie, damit jede in allen Grafiken gleich
+# dargestellt wird (verbessert die Wiedererkennung)
+FARBEN = {
+    # Strom
+    'BHKW_el': 'darkblue',
+    'PV': 'gold',
+    'Stromspeicher_out': 'blueviolet',
+    'Strombezug': 'darkred',
+    'Strombedarf': 'darkgray',
+    'Waermepumpe_el': 'darkgreen',
+    'Stromspeicher_in': 'fuchsia',
+    'Stromueberschuss': 'black',
+    # Waerme
+    'BHKW_th': 'lightskyblue',
+    'Solarthermie': 'darkorange',
+    'Waermepumpe_th': 'greenyellow',
+    'Gaskessel': 'crimson',
+    'Waermespeicher_out': 'saddlebrown',
+    'Waermebezug': 'indianred',
+    'Waermebedarf': 'lightgray',
+    'Waermespeicher_in': 'tan',
+    'Waermeueberschuss': 'black',
+    # Technologien (Vergleich der Teams, Dauerlinien)
+    'BHKW': 'darkblue',
+    'Waermepumpe': 'darkgreen',
+    'Stromspeicher': 'blueviolet',
+    'Waermespeicher': 'saddlebrown',
+}
+
+
+def plots_available():
+    """Return True if matplotlib is installed."""
+    return Figure is not None
+
+
+def zeichne_zeitreihe(aufgabe):
+    """Draw one stacked area plot and save it.
+
+    `aufgabe` is a dictionary with the keys 'df' (DataFrame with one column
+    per flow), 'titel', 'ylabel', 'xticks' (positions and labels),
+    'dateiname' and 'dpi'. Returns the file name.
+    """
+    df = aufgabe['df']
+    fig = Figure(figsize=(30, 15))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+
+    df.plot(ax=ax, kind='area', stacked=True, linewidth=0, use_index=False,
+            color=[FARBEN.get(k, 'black') for k in df.keys()])
+    ax.set_title(aufgabe['titel'], size=25)
+    ax.set_ylabel(aufgabe['ylabel'], size=25)
+
+    # Legende nach Energiemenge sortieren
+    handles, labels = ax.get_legend_handles_labels()
+    sorter = df.sum().sort_values(ascending=False).index.tolist()
+    reihenfolge = sorted(range(len(labels)),
+                         key=lambda i: sorter.index(labels[i]))
+    ax.legend([handles[i] for i in reihenfolge],
+              [labels[i] for i in reihenfolge],
+              bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0,
+              prop={'size': 25})
+    ax.tick_params(axis='y', labelsize=25)
+    positionen, xlabels = aufgabe['xticks']
+    ax.set_xticks(positionen)
+    ax.set_xticklabels(xlabels, rotation=45, size=25)
+
+    fig.savefig(aufgabe['dateiname'], dpi=aufgabe['dpi'], bbox_inches='tight')
+
+    # Speicher sofort freigeben
+    fig.clear()
+    return aufgabe['dateiname']
+
+
+def zeichne_balken(aufgabe):
+    """Draw one bar chart (one group of bars per team) and save it.
+
+    `aufgabe` is a dictionary with the keys 'df' (DataFrame with one row per
+    team and one column per series), 'titel', 'ylabel', 'gestapelt',
+    'dateiname' and 'dpi'. Returns the file name.
+    """
+    df = aufgabe['df']
+    fig = Figure(figsize=(max(8, 2 + 1.5 * len(df)), 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+
+    farben = [FARBEN.get(k) for k in df.keys()]
+    df.plot(ax=ax, kind='bar', stacked=aufgabe['gestapelt'], rot=0,
+            color=farben if all(farben) else None)
+    ax.set_title(aufgabe['titel'], size=16)
+    ax.set_ylabel(aufgabe['ylabel'], size=14)
+    ax.set_xlabel('')
+    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
+
+    fig.savefig(aufgabe['dateiname'], dpi=aufgabe['dpi'], bbox_inches='tight')
+    fig.clear()
+    return aufgabe['dateiname']
+
+
+def zeichne_dauerlinien(aufgabe):
+    """Draw the duration curves of several flows in one plot and save it.
+
+    `aufgabe` is a dictionary with the keys 'df' (DataFrame with one sorted
+    column per flow), 'titel', 'ylabel', 'dateiname' and 'dpi'. Returns the
+    file name.
+    """
+    df = aufgabe['df']
+    fig = Figure(figsize=(15, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(1, 1, 1)
+
+    farben = [FARBEN.get(k) for k in df.keys()]
+    df.plot(ax=ax, linewidth=2, color=farben if all(farben) else None)
+    ax.set_title(aufgabe['titel'], size=16)
+    ax.set_ylabel(aufgabe['ylabel'], size=14)
+    ax.set_xlabel('Zeitschritte (absteigend sortiert)', size=14)
+    ax.set_xlim(0, len(df))
+    ax.grid(True, alpha=0.3)
+    ax.legend(bbox_to_anchor=(1.02, 1), loc='upper left', borderaxespad=0)
+
+    fig.savefig(aufgabe['dateiname'], dpi=aufgabe['dpi'], bbox_inches='tight')
+    fig.clear()
+    return aufgabe['dateiname']
+
+
+def zeichne_heatmaps(aufgabe):
+    """Draw one heatmap (time step of the day x day) per flow and save them
+    in one figure.
+
+    `aufgabe` is a dictionary with the keys 'heatmaps' ({name: array days x
+    time steps per day}), 'tage' (dates of the days), 'titel', 'dateiname'
+    and 'dpi'. Returns the file name.
+    """
+    heatmaps = aufgabe['heatmaps']
+    fig = Figure(figsize=(15, 3.5 * len(heatmaps)), constrained_layout=True)
+    FigureCanvasAgg(fig)
+    tage = aufgabe['tage']
+    monate = [i for i, t in enumerate(tage) if t.day == 1]
+
+    for i, (name, werte) in enumerate(heatmaps.items()):
+        ax = fig.add_subplot(len(heatmaps), 1, i + 1)
+        bild = ax.imshow(werte.T, aspect='auto', origin='lower',
+                         interpolation='nearest', cmap='viridis',
+                         extent=(0, werte.shape[0], 0, 24))
+        ax.set_title(name, size=14)
+        ax.set_ylabel('Uhrzeit [h]')
+        ax.set_yticks([0, 6, 12, 18, 24])
+        ax.set_xticks(monate)
+        ax.set_xticklabels(['{0:%b}'.format(tage[m]) for m in monate])
+        fig.colorbar(bild, ax=ax, label='kWh/h')
+    fig.suptitle(aufgabe['titel'], size=16)
+
+    fig.savefig(aufgabe['dateiname'], dpi=aufgabe['dpi'], bbox_inches='tight')
+    fig.clear()
+    return aufgabe['dateiname']
+
+
+# Zeichenfunktion je Art der Aufgabe (Schluessel 'art', Standard 'zeitreihe')
+ZEICHNER = {'zeitreihe': zeichne_zeitreihe,
+            'balken': zeichne_balken,
+            'dauerlinien': zeichne_dauerlinien,
+            'heatmaps': zeichne_heatmaps}
+
+
+def zeichne(aufgabe):
+    """Render one plot task with the drawing function of its kind."""
+    return ZEICHNER[aufgabe.get('art', 'zeitreihe')](aufgabe)
+
+
+def zeichne_alle(aufgaben, plot_workers=1):
+    """Render all plot tasks, with `plot_workers` > 1 in a process pool."""
+    if Figure is None or not aufgaben:
+        return []
+    if plot_workers > 1 and len(aufgaben) > 1:
+        with ProcessPoolExecutor(
+                max_workers=min(plot_workers, len(aufgaben))) as pool:
+            return list(pool.map(zeichne, aufgaben))
+    return [zeichne(a) for a in aufgaben]
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Laufzeitmessung
+---------------
+
+Timing and memory instrumentation of the phases of `run_model` (profiling in
+config.yaml). `run_model` starts a measurement for its team and sets a
+`messpunkt` after every phase; the time since the previous point is the
+duration of the phase. The size of the model is recorded as phase
+'model_size'. Phases running in the background (dump) are timed
+with `phase`.
+
+Every record holds team, phase, duration in seconds, the resident memory
+after the phase and the peak resident memory of the process so far (MB).
+The records of a team are written as JSON lines to
+results/profile_team_<n>.jsonl and summarized at the end of `main()`.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import contextlib
+import json
+import os
+import sys
+import time
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+# Laufende Messung des Prozesses (None: keine Messung)
+_messung = None
+
+
+def peak_rss(kinder=False):
+    """Return the peak resident memory of the process (or of its finished
+    child processes) in MB, None where the platform does not provide it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if kinder
+                              else resource.RUSAGE_SELF).ru_maxrss
+    # Linux: kB, macOS: Byte
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _speicher():
+    """Return (resident memory, peak resident memory) of the process in MB
+    (None where the platform does not provide it)."""
+    rss = None
+    try:
+        with open('/proc/self/statm') as f:
+            rss = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    return rss, peak_rss()
+
+
+class Messung(object):
+    """Phase records of one team."""
+
+    def __init__(self, team_number):
+        self.team = team_number + 1
+        self.eintraege = []
+        self._start = time.perf_counter()
+
+    def erfasse(self, phase, sekunden, **extra):
+        rss, peak = _speicher()
+        eintrag = {'team': self.team, 'phase': phase,
+                   'seconds': round(sekunden, 4),
+                   'rss_mb': None if rss is None else round(rss, 1),
+                   'peak_rss_mb': None if peak is None else round(peak, 1)}
+        eintrag.update(extra)
+        self.eintraege.append(eintrag)
+
+    def messpunkt(self, phase, **extra):
+        jetzt = time.perf_counter()
+        self.erfasse(phase, jetzt - self._start, **extra)
+        self._start = jetzt
+
+    def modellgroesse(self, model):
+        start = time.perf_counter()
+        anzahl = {'variables': model.nvariables(),
+                  'constraints': model.nconstraints()}
+        self.erfasse('model_size', time.perf_counter() - start, **anzahl)
+        # Zaehlen nicht der folgenden Phase anrechnen
+        self._start = time.perf_counter()
+
+
+def starte(team_number):
+    """Start the measurement of a team (replaces a running measurement)."""
+    global _messung
+    _messung = Messung(team_number)
+
+
+def messpunkt(phase, **extra):
+    """End `phase` (started at the previous point) of the running
+    measurement, no-op without measurement."""
+    if _messung is not None:
+        _messung.messpunkt(phase, **extra)
+
+
+def modellgroesse(model):
+    """Record the number of variables and constraints of `model` (only
+    counted while measuring)."""
+    if _messung is not None:
+        _messung.modellgroesse(model)
+
+
+def erfasse(phase, sekunden, **extra):
+    """Add a phase with a known duration (e.g. reported by the solver)."""
+    if _messung is not None:
+        _messung.erfasse(phase, sekunden, **extra)
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Time a phase independently of the points, e.g. in a thread."""
+    messung = _messung
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if messung is not None:
+            messung.erfasse(name, time.perf_counter() - start)
+
+
+def beende(file_path=None):
+    """Stop the measurement, write the records as JSON lines to
+    `file_path` (optional) and return them."""
+    global _messung
+    eintraege = [] if _messung is None else _messung.eintraege
+    _messung = None
+    if file_path is not None:
+        with open(file_path, 'w') as f:
+            for eintrag in eintraege:
+                f.write(json.dumps(eintrag) + '\n')
+    return eintraege
+
+
+def lade(file_paths):
+    """Read the JSON lines files of several teams into one DataFrame."""
+    eintraege = []
+    for file_path in file_paths:
+        if os.path.exists(file_path):
+            with open(file_path) as f:
+                eintraege += [json.loads(zeile) for zeile in f
+                              if zeile.strip()]
+    return pd.DataFrame(eintraege)
+
+
+def zusammenfassung(df):
+    """Return the duration of every phase (rows, in the order of the run)
+    per team (columns) in seconds plus the peak memory per team."""
+    if df.empty:
+        return df
+    phasen = list(dict.fromkeys(df['phase']))
+    tabelle = df.pivot_table(index='phase', columns='team', values='seconds',
+                             aggfunc='sum').reindex(phasen)
+    if df['peak_rss_mb'].notna().any():
+        tabelle.loc['peak_rss_mb'] = df.groupby('team')['peak_rss_mb'].max()
+    return tabelle.round(2)
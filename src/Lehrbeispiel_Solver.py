@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Solver
+------
+
+Solving of the optimisation model with the settings of config.yaml:
+
+* solver_interface: 'file' writes an LP file and starts the solver for every
+  solve (oemof default), every solve starts from scratch.
+* solver_interface: 'persistent' keeps the model inside the solver
+  (<solver>_persistent of Pyomo, e.g. gurobi, cplex or xpress, or
+  appsi_<solver> with Pyomo >= 6.4, e.g. appsi_highs). A reused model
+  (reuse_model) only transfers the changed parameters; the solver keeps
+  its last optimal basis and the simplex continues from it (the warm start
+  of the LP). Falls back to the file interface if the persistent interface
+  is not available.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import logging
+import warnings
+
+import pyomo.environ as po
+from pyomo.opt import SolverFactory
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
+
+
+def _persistent_solver(solver):
+    """Return a persistent interface of `solver` or None."""
+    if solver.startswith('appsi_') or solver.endswith('_persistent'):
+        kandidaten = [solver]
+    else:
+        kandidaten = [solver + '_persistent', 'appsi_' + solver]
+    registriert = set(SolverFactory)
+    for name in kandidaten:
+        if name not in registriert:
+            continue
+        opt = SolverFactory(name)
+        if opt.available(exception_flag=False):
+            return opt
+    return None
+
+
+def _uebertrage(opt, model, aenderungen):
+    """Transfer the changes of a reused model to a Pyomo persistent solver
+    (the appsi interfaces detect changes by themselves)."""
+    if not isinstance(opt, PersistentSolver):
+        return
+    opt.set_objective(model.objective)
+    for var in aenderungen.get('variablen', []):
+        opt.update_var(var)
+    # Nebenbedingungen mit geaenderten festen Werten oder Parametern neu
+    # uebergeben
+    for constraint in aenderungen.get('nebenbedingungen', []):
+        opt.remove_constraint(constraint)
+        opt.add_constraint(constraint)
+
+
+def _pruefe(results):
+    status = results.solver.status
+    termination_condition = results.solver.termination_condition
+    if (status == po.SolverStatus.ok
+            and termination_condition == po.TerminationCondition.optimal):
+        logging.info('Optimization successful...')
+    else:
+        warnings.warn('Optimization ended with status {0} and termination '
+                      'condition {1}'.format(status, termination_condition),
+                      UserWarning)
+
+
+def solve(model, cfg, aenderungen=None):
+    """Solve `model` (a `solph.Model`) and store the solver results in the
+    energy system like `solph.Model.solve`.
+
+    `aenderungen` ({'variablen': [...], 'nebenbedingungen': [...]}) lists
+    the components changed since the last solve of a reused model.
+    """
+    solver = cfg['solver']
+    tee = cfg['solver_verbose']
+
+    if cfg.get('solver_interface', 'file') == 'persistent':
+        opt = getattr(model, 'persistent_solver', None)
+        if opt is None:
+            opt = _persistent_solver(solver)
+            if opt is None:
+                logging.warning('No persistent interface for {0}, use the '
+                                'file interface.'.format(solver))
+            else:
+                logging.info('Use the persistent interface {0}.'.format(
+                    opt.name))
+                if isinstance(opt, PersistentSolver):
+                    opt.set_instance(model)
+                model.persistent_solver = opt
+        elif aenderungen:
+            _uebertrage(opt, model, aenderungen)
+        if opt is not None:
+            results = opt.solve(model, tee=tee)
+            _pruefe(results)
+            if (isinstance(opt, PersistentSolver)
+                    and getattr(model, 'dual', None) is not None):
+                # Dualwerte werden bei persistenten Solvern nicht
+                # automatisch geladen
+                opt.load_duals()
+            model.es.results = results
+            model.solver_results = results
+            return results
+
+    return model.solve(solver=solver, solve_kwargs={'tee': tee})
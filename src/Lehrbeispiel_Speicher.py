@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Speicheranalyse
+---------------
+
+Operation of the storages (storage_analysis in config.yaml) from their
+storage contents in the `Flussmatrix`: cycles counted with the rainflow
+method, histogram of the depths of discharge, state of charge statistics,
+idle time and the energy lost in the storage.
+
+The turning points of the storage content are found with one vectorised
+pass over the time series; the rainflow count then runs once over the
+turning points with a stack (linear in their number). The functions take
+plain arrays, so they also serve the results of parameter sweeps.
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import numpy as np
+import pandas as pd
+
+
+# Speicher: (Einspeicherung, Ausspeicherung, Wirkungsgrad ein, aus,
+# Anfangsladestand)
+SPEICHER = [('Stromspeicher', 'Stromspeicher_in', 'Stromspeicher_out',
+             'cf_Stromspeicher_ein', 'cf_Stromspeicher_aus',
+             'isl_Stromspeicher'),
+            ('Waermespeicher', 'Waermespeicher_in', 'Waermespeicher_out',
+             'cf_Waermespeicher_ein', 'cf_Waermespeicher_aus',
+             'isl_Waermespeicher')]
+
+# Klassengrenzen der Entladetiefe (Anteil der Kapazitaet)
+ENTLADETIEFEN = np.linspace(0, 1, 11)
+
+# Aenderungen unter diesem Anteil der Kapazitaet gelten als Stillstand
+TOLERANZ = 1e-6
+
+
+def umkehrpunkte(inhalt, toleranz=0.0):
+    """Return the turning points (local extrema, first and last value) of
+    a time series. Changes up to `toleranz` are ignored."""
+    inhalt = np.asarray(inhalt, dtype=float)
+    if len(inhalt) < 2:
+        return inhalt.copy()
+    aenderung = np.diff(inhalt)
+    schritte = np.flatnonzero(np.abs(aenderung) > toleranz)
+    if len(schritte) == 0:
+        return inhalt[[0, -1]]
+    richtung = np.sign(aenderung[schritte])
+    # Extremum am Beginn eines Abschnitts mit neuer Richtung
+    wechsel = schritte[1:][richtung[1:] != richtung[:-1]]
+    return inhalt[np.concatenate([[0], wechsel, [len(inhalt) - 1]])]
+
+
+def rainflow(punkte):
+    """Count the cycles of a series of turning points (ASTM E1049
+    rainflow). Returns the ranges and the counts (1 for a full cycle, 0.5
+    for a half cycle) as arrays."""
+    spannweiten, anzahl = [], []
+    stapel = []
+    for punkt in punkte:
+        stapel.append(punkt)
+        while len(stapel) >= 3:
+            x = abs(stapel[-1] - stapel[-2])
+            y = abs(stapel[-2] - stapel[-3])
+            if x < y:
+                break
+            if len(stapel) == 3:
+                # Halbzyklus am Anfang des Stapels
+                spannweiten.append(y)
+                anzahl.append(0.5)
+                del stapel[0]
+            else:
+                spannweiten.append(y)
+                anzahl.append(1.0)
+                letzter = stapel.pop()
+                del stapel[-2:]
+                stapel.append(letzter)
+    # verbleibende Spannweiten sind Halbzyklen
+    rest = np.abs(np.diff(stapel))
+    spannweiten.extend(rest)
+    anzahl.extend([0.5] * len(rest))
+    return np.array(spannweiten, dtype=float), np.array(anzahl, dtype=float)
+
+
+def analysiere_speicher(inhalt, einspeicherung, ausspeicherung, kapazitaet,
+                        eta_ein=1.0, eta_aus=1.0, stunden=1.0,
+                        anfangsinhalt=None):
+    """Return the operation KPI of one storage as dictionary.
+
+    `inhalt` is the storage content [kWh] at the end of every time step,
+    `einspeicherung` and `ausspeicherung` the flows into and out of the
+    storage [kWh/h] per time step of `stunden` hours, `kapazitaet` the
+    storage size [kWh] and `anfangsinhalt` the content before the first
+    time step (first value of `inhalt` if None).
+    """
+    inhalt = np.asarray(inhalt, dtype=float)
+    if anfangsinhalt is None:
+        anfangsinhalt = inhalt[0]
+    ein = np.asarray(einspeicherung, dtype=float)
+    aus = np.asarray(ausspeicherung, dtype=float)
+    toleranz = TOLERANZ * max(kapazitaet, 1.0)
+
+    spannweiten, anzahl = rainflow(umkehrpunkte(np.r_[anfangsinhalt, inhalt],
+                                                toleranz))
+    tiefen = spannweiten / kapazitaet
+    histogramm, _ = np.histogram(np.clip(tiefen, 0, 1), bins=ENTLADETIEFEN,
+                                 weights=anzahl)
+    ladestand = inhalt / kapazitaet
+
+    # Verluste aus der Bilanz: eingespeist - ausgespeist - Bestandsaenderung
+    energie_ein = ein.sum() * stunden
+    energie_aus = aus.sum() * stunden
+    verluste = energie_ein - energie_aus - (inhalt[-1] - anfangsinhalt)
+    umwandlung = (energie_ein * (1 - eta_ein)
+                  + energie_aus * (1 / eta_aus - 1))
+
+    kennzahlen = {
+        'Kapazitaet [kWh]': kapazitaet,
+        'Vollzyklen (Rainflow)': float((anzahl * tiefen).sum()),
+        'Zyklen': float(anzahl.sum()),
+        'Mittlere Entladetiefe': (float((anzahl * tiefen).sum()
+                                        / anzahl.sum())
+                                  if anzahl.sum() > 0 else 0.0),
+        'Maximale Entladetiefe': float(tiefen.max()) if len(tiefen) else 0.0,
+        'Mittlerer Ladestand': float(ladestand.mean()),
+        'Minimaler Ladestand': float(ladestand.min()),
+        'Maximaler Ladestand': float(ladestand.max()),
+        'Anteil voll': float((ladestand >= 1 - TOLERANZ).mean()),
+        'Anteil leer': float((ladestand <= TOLERANZ).mean()),
+        'Stillstand [h]': float(((ein + aus) <= toleranz).sum() * stunden),
+        'Eingespeichert [kWh]': energie_ein,
+        'Ausgespeichert [kWh]': energie_aus,
+        'Verluste [kWh]': verluste,
+        'Umwandlungsverluste [kWh]': umwandlung,
+        'Selbstentladung [kWh]': verluste - umwandlung,
+    }
+    for unten, oben, wert in zip(ENTLADETIEFEN[:-1], ENTLADETIEFEN[1:],
+                                 histogramm):
+        kennzahlen['Entladetiefe {0:.0%}-{1:.0%}'.format(unten, oben)] = \
+            float(wert)
+    return kennzahlen
+
+
+def speicheranalyse(flussmatrix, param_value):
+    """Return the operation KPI of all installed storages as DataFrame (one
+    column per storage, empty without storages)."""
+    stunden = flussmatrix.schrittweite()
+    ergebnisse = {}
+    for name, rein, raus, eta_ein, eta_aus, isl in SPEICHER:
+        kapazitaet = flussmatrix.investitionen.get(name, 0.0)
+        if kapazitaet <= 0 or name not in flussmatrix.speicherstand:
+            continue
+        ergebnisse[name] = analysiere_speicher(
+            flussmatrix.speicherstand[name], flussmatrix[rein],
+            flussmatrix[raus], kapazitaet, param_value[eta_ein],
+            param_value[eta_aus], stunden, param_value[isl] * kapazitaet)
+    if not ergebnisse:
+        return pd.DataFrame()
+    # Zeilen in der Reihenfolge der Kennzahlen
+    return pd.DataFrame(ergebnisse,
+                        index=list(next(iter(ergebnisse.values()))))
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+"""
+Parameterstudie
+---------------
+
+Parameter sweeps on top of `run_model`. The sweep is defined in
+experiment_config/sweep.yaml: design parameters of the teams are varied
+over ranges or lists of values, all combinations are solved (in parallel
+with number_of_workers) and the KPI record of every scenario is written to
+one SQLite table. Scenarios already stored in the database are skipped, so
+an interrupted sweep continues where it stopped. The id of a scenario
+contains the content key of its solve (see Lehrbeispiel_Inkrementell):
+after a change of config.yaml, the parameter files, the time series or the
+model code the scenarios are solved again.
+
+Start with
+
+    python Lehrbeispiel_Sweep.py
+
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import dataclasses
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from oemof.tools import logger
+
+from Lehrbeispiel import run_model
+from Lehrbeispiel_Auswertung import kennzahlen_aus_ergebnissen
+from Lehrbeispiel_Daten import (abs_path, load_config, load_parameters,
+                                apply_overrides)
+from Lehrbeispiel_Inkrementell import modell_schluessel
+from Lehrbeispiel_Kennzahlen import Kennzahlen
+
+
+KENNZAHLEN = [f.name for f in dataclasses.fields(Kennzahlen)]
+
+
+def _werte(definition):
+    """Values of one swept parameter: a list ('values') or a range
+    ('start', 'stop', 'steps' as in numpy.linspace)."""
+    if 'values' in definition:
+        return list(definition['values'])
+    return [float(v) for v in np.linspace(definition['start'],
+                                          definition['stop'],
+                                          definition['steps'])]
+
+
+def szenarien(spec, cfg):
+    """Expand the sweep definition into a list of scenarios
+    {'id', 'team', 'parameter'} (cross product of all parameters). The id
+    depends on the team, the swept values and the content key of the model
+    inputs of the configuration `cfg`."""
+    namen = list(spec['parameters'])
+    werte = [_werte(spec['parameters'][n]) for n in namen]
+    liste = []
+    for team in spec['teams']:
+        basis = load_parameters(cfg, team - 1)
+        for kombination in itertools.product(*werte):
+            parameter = dict(zip(namen, kombination))
+            modell = modell_schluessel(cfg, apply_overrides(basis, parameter))
+            schluessel = json.dumps([team, parameter, modell],
+                                    sort_keys=True)
+            liste.append({
+                'id': hashlib.sha1(schluessel.encode()).hexdigest()[:16],
+                'team': team,
+                'parameter': parameter})
+    return liste
+
+
+def oeffne_datenbank(file_path):
+    """Open (and create) the result database of the sweep."""
+    con = sqlite3.connect(file_path)
+    spalten = ', '.join('"{0}" REAL'.format(k) for k in KENNZAHLEN)
+    con.execute('CREATE TABLE IF NOT EXISTS szenarien ('
+                'id TEXT PRIMARY KEY, team INTEGER, parameter TEXT, '
+                'status TEXT, fehler TEXT, dauer REAL, {0})'.format(spalten))
+    con.commit()
+    return con
+
+
+def _speichere(con, szenario, ergebnis):
+    spalten = ['id', 'team', 'parameter', 'status', 'fehler',
+               'dauer'] + KENNZAHLEN
+    werte = [szenario['id'], szenario['team'],
+             json.dumps(szenario['parameter'], sort_keys=True),
+             ergebnis['status'], ergebnis['fehler'], ergebnis['dauer']]
+    werte += [ergebnis['kennzahlen'].get(k) for k in KENNZAHLEN]
+    con.execute('INSERT OR REPLACE INTO szenarien ({0}) VALUES ({1})'.format(
+        ', '.join('"{0}"'.format(s) for s in spalten),
+        ', '.join('?' * len(spalten))), werte)
+    con.commit()
+
+
+def rechne_szenario(config_path, szenario):
+    """Solve one scenario and return status and KPI record. Errors are
+    returned, not raised, so that the sweep continues."""
+    team_number = szenario['team'] - 1
+    ergebnis = {'status': 'ok', 'fehler': '', 'dauer': 0.0, 'kennzahlen': {}}
+    start = time.time()
+    try:
+        cfg = load_config(config_path)
+        results = run_model(config_path, team_number,
+                            overrides=szenario['parameter'])
+        param_value = apply_overrides(load_parameters(cfg, team_number),
+                                      szenario['parameter'])
+        _, kennzahlen = kennzahlen_aus_ergebnissen(results, param_value)
+        ergebnis['kennzahlen'] = dataclasses.asdict(kennzahlen)
+    except Exception as e:
+        logging.error(traceback.format_exc())
+        ergebnis['status'] = 'Fehler'
+        ergebnis['fehler'] = '{0}: {1}'.format(type(e).__name__, e)
+    ergebnis['dauer'] = round(time.time() - start, 1)
+    return ergebnis
+
+
+def lade_ergebnisse(file_path, ids=None):
+    """Return the sweep results as DataFrame with one column per swept
+    parameter (prefix 'param_', some parameters have the same name as a
+    KPI, e.g. vc_CO2), optionally only the scenarios `ids`."""
+    con = sqlite3.connect(file_path)
+    try:
+        df = pd.read_sql_query('SELECT * FROM szenarien', con)
+    finally:
+        con.close()
+    if ids is not None:
+        df = df[df['id'].isin(ids)].reset_index(drop=True)
+    parameter = pd.DataFrame([json.loads(p) for p in df['parameter']],
+                             index=df.index).add_prefix('param_')
+    df = pd.concat([df.drop(columns='parameter'), parameter], axis=1)
+    return df.sort_values(['team'] + list(parameter.columns))
+
+
+def run_sweep(config_path, sweep_path):
+    """Solve all scenarios of the sweep that are not yet in the database."""
+    cfg = load_config(config_path)
+    spec = load_config(sweep_path)
+    database = os.path.join(abs_path, 'results',
+                            spec.get('database', 'sweep.sqlite'))
+
+    con = oeffne_datenbank(database)
+    fertig = set(r[0] for r in con.execute(
+        "SELECT id FROM szenarien WHERE status = 'ok'"))
+    alle = szenarien(spec, cfg)
+    offen = [s for s in alle if s['id'] not in fertig]
+    logging.info('Sweep: {0} scenarios, {1} already solved.'.format(
+        len(alle), len(alle) - len(offen)))
+
+    number_of_workers = min(spec.get('number_of_workers',
+                                     cfg.get('number_of_workers', 1)),
+                            max(len(offen), 1))
+    try:
+        if number_of_workers > 1:
+            with ProcessPoolExecutor(max_workers=number_of_workers) as pool:
+                futures = {pool.submit(rechne_szenario, config_path, s): s
+                           for s in offen}
+                for i, future in enumerate(as_completed(futures)):
+                    szenario = futures[future]
+                    try:
+                        ergebnis = future.result()
+                    except Exception as e:
+                        # abgestuerzter Prozess (BrokenProcessPool): als Fehler
+                        # speichern, die uebrigen Ergebnisse bleiben
+                        logging.error('Scenario {0} failed: {1}'.format(
+                            szenario['id'], e))
+                        ergebnis = {'status': 'Fehler',
+                                    'fehler': '{0}: {1}'.format(
+                                        type(e).__name__, e),
+                                    'dauer': None, 'kennzahlen': {}}
+                    _speichere(con, szenario, ergebnis)
+                    logging.info('Scenario {0}/{1} done.'.format(
+                        i + 1, len(offen)))
+        else:
+            for i, szenario in enumerate(offen):
+                _speichere(con, szenario,
+                           rechne_szenario(config_path, szenario))
+                logging.info('Scenario {0}/{1} done.'.format(
+                    i + 1, len(offen)))
+    finally:
+        con.close()
+    return database
+
+
+def main():
+    config_file_path = os.path.abspath('../experiment_config/config.yaml')
+    sweep_file_path = os.path.abspath('../experiment_config/sweep.yaml')
+    logger.define_logging(logfile='sweep.log')
+
+    database = run_sweep(config_file_path, sweep_file_path)
+    # nur die Szenarien der aktuellen Modelleingaben
+    ids = [s['id'] for s in szenarien(load_config(sweep_file_path),
+                                      load_config(config_file_path))]
+    ergebnisse = lade_ergebnisse(database, ids)
+    print('')
+    print('Parameterstudie: {0} Szenarien in {1}'.format(len(ergebnisse),
+                                                         database))
+    spalten = [c for c in ergebnisse.columns
+               if c not in KENNZAHLEN and c not in ('id', 'fehler')]
+    print(ergebnisse[spalten + ['sum_costs', 'em_co2', 'Deckungsgrad']]
+          .to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+Technologietabelle
+------------------
+
+One row per investment technology with the names of its design parameters
+(capex, lifetime n, conversion factor cf, minimum and maximum size). The
+periodic costs (annuities) and the cost breakdown are computed as NumPy
+array operations over all technologies at once. The functions take the
+design parameters of one team (Series indexed by var_name) or of many
+scenarios (DataFrame with one row per scenario) and return a Series or
+DataFrame with one entry or column per technology.
+
+A new technology only needs a new row here (and its component in
+experiment_config/components.yaml).
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+
+Technologie = namedtuple('Technologie',
+                         ['name', 'capex', 'n', 'cf', 'minimum', 'maximum',
+                          'flaeche'])
+
+# Parameternamen je Technologie; bei PV und Solarthermie ist das Minimum
+# eine Flaeche [m2] (flaeche=True), umgerechnet mit dem Wirkungsgrad in kW
+TECHNOLOGIEN = [
+    Technologie('PV', 'capex_PV', 'n_PV', 'cf_PV', 'A_min_PV', None, True),
+    Technologie('Solarthermie', 'capex_Sol', 'n_Sol', 'cf_Sol', 'A_min_Sol',
+                None, True),
+    Technologie('Gaskessel', 'capex_Gaskessel', 'n_Gaskessel',
+                'cf_Gaskessel', 'min_Gaskessel', 'max_Gaskessel', False),
+    Technologie('BHKW', 'capex_BHKW', 'n_BHKW', 'cf_BHKW_el', 'min_BHKW',
+                'max_BHKW', False),
+    Technologie('Waermepumpe', 'capex_Waermepumpe', 'n_Waermepumpe',
+                'COP_Waermepumpe', 'min_Waermepumpe', 'max_Waermepumpe',
+                False),
+    Technologie('Stromspeicher', 'capex_Stromspeicher', 'n_Stromspeicher',
+                'cf_Stromspeicher_ein', 'min_Stromspeicher',
+                'max_Stromspeicher', False),
+    Technologie('Waermespeicher', 'capex_Waermespeicher', 'n_Waermespeicher',
+                'cf_Waermespeicher_ein', 'min_Waermespeicher',
+                'max_Waermespeicher', False),
+]
+
+NAMEN = [t.name for t in TECHNOLOGIEN]
+
+
+def _spalte(parameter, namen, standard=np.nan):
+    """Values of the parameters `namen` (one per technology, None for
+    `standard`) as array (technologies,) or (scenarios, technologies)."""
+    vorhanden = [n for n in namen if n is not None]
+    werte = np.asarray(parameter[vorhanden], dtype=float)
+    if len(vorhanden) == len(namen):
+        return werte
+    ergebnis = np.full(werte.shape[:-1] + (len(namen),), standard)
+    ergebnis[..., [i for i, n in enumerate(namen) if n is not None]] = werte
+    return ergebnis
+
+
+def spalten(parameter):
+    """Return the technology table as dictionary of arrays {column:
+    (technologies,) or (scenarios, technologies)} with the columns capex,
+    n, wacc, cf, min and max (min in kW or kWh, max inf if unlimited)."""
+    cf = _spalte(parameter, [t.cf for t in TECHNOLOGIEN])
+    minimum = _spalte(parameter, [t.minimum for t in TECHNOLOGIEN])
+    flaeche = np.array([t.flaeche for t in TECHNOLOGIEN])
+    return {'capex': _spalte(parameter, [t.capex for t in TECHNOLOGIEN]),
+            'n': _spalte(parameter, [t.n for t in TECHNOLOGIEN]),
+            'wacc': _spalte(parameter, ['wacc'] * len(TECHNOLOGIEN)),
+            'cf': cf,
+            'min': np.where(flaeche, minimum * cf, minimum),
+            'max': _spalte(parameter, [t.maximum for t in TECHNOLOGIEN],
+                           standard=np.inf)}
+
+
+def annuitaet(capex, n, wacc):
+    """Annuity of `capex` over `n` years with the interest rate `wacc`
+    (as oemof.tools.economics.annuity, element-wise for arrays)."""
+    capex, n, wacc = np.broadcast_arrays(np.asarray(capex, dtype=float),
+                                         np.asarray(n, dtype=float),
+                                         np.asarray(wacc, dtype=float))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        faktor = (1 + wacc) ** n
+        return np.where(wacc == 0, capex / n,
+                        capex * wacc * faktor / (faktor - 1))
+
+
+def _wie(parameter, werte):
+    """Wrap an array (..., technologies) like the input parameters."""
+    if isinstance(parameter, pd.DataFrame):
+        return pd.DataFrame(werte, index=parameter.index, columns=NAMEN)
+    return pd.Series(werte, index=NAMEN)
+
+
+def periodische_kosten(parameter):
+    """Return the equivalent periodic costs (annuity of the specific capex)
+    of every technology in Euro/(kW a) or Euro/(kWh a)."""
+    s = spalten(parameter)
+    return _wie(parameter, annuitaet(s['capex'], s['n'], s['wacc']))
+
+
+def tabelle(param_value):
+    """Return the technology table of one team as DataFrame (one row per
+    technology) including the periodic costs epc."""
+    s = spalten(param_value)
+    s['epc'] = annuitaet(s['capex'], s['n'], s['wacc'])
+    return pd.DataFrame(s, index=NAMEN)
+
+
+def kostenaufteilung(investitionen, parameter):
+    """Return investment costs (capex) and annuities per technology for the
+    investment sizes `investitionen` ({technology: size}, Series or, for
+    scenarios, DataFrame with one column per technology)."""
+    s = spalten(parameter)
+    if isinstance(investitionen, dict):
+        investitionen = pd.Series(investitionen)
+    groesse = np.asarray(investitionen[NAMEN], dtype=float)
+    return {'capex': _wie(parameter, groesse * s['capex']),
+            'annuitaet': _wie(parameter, groesse * annuitaet(
+                s['capex'], s['n'], s['wacc']))}
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+
+"""
+Teamvergleich
+-------------
+
+Cross-team comparison (comparison_report in config.yaml). `display_results`
+appends the KPI record of every team (investment sizes, energies,
+emissions, costs, coverage ratios, storage use) as one row to the table
+`teams` of results/teams.sqlite; `run_team` deletes the row of its team
+first, so a team failing in this run is reported as missing instead of
+with the KPI of an earlier run. After all teams the report is built from
+this one table in a single pass:
+
+* results/vergleich/Auswertungsergebnisse_Vergleich.csv: the values of
+  Auswertungsergebnisse_Text.csv with one column per team,
+* results/vergleich/Kennzahlen_Vergleich.csv: the unrounded KPI records,
+* bar charts of costs, CO2 emissions, investment sizes and coverage ratios.
+
+The report neither restores nor reads the results of the single teams.
+Start it on its own with
+
+    python Lehrbeispiel_Vergleich.py
+
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import dataclasses
+import logging
+import os
+import sqlite3
+import time
+
+import pandas as pd
+from oemof.tools import logger
+
+from Lehrbeispiel_Daten import abs_path, load_config, load_result_labels
+from Lehrbeispiel_Kennzahlen import Kennzahlen
+from Lehrbeispiel_Plots import plots_available, zeichne_balken
+
+
+KENNZAHLEN = [f.name for f in dataclasses.fields(Kennzahlen)]
+
+DATENBANK = os.path.join(abs_path, 'results', 'teams.sqlite')
+
+# Spalten der Grafiken: (Kennzahl, Beschriftung)
+KOSTEN = [('annuity_PV', 'PV'),
+          ('annuity_Solarthermie', 'Solarthermie'),
+          ('annuity_Gaskessel', 'Gaskessel'),
+          ('annuity_BHKW', 'BHKW'),
+          ('annuity_Waermepumpe', 'Waermepumpe'),
+          ('annuity_Stromspeicher', 'Stromspeicher'),
+          ('annuity_Waermespeicher', 'Waermespeicher'),
+          ('var_costs_es', 'Betriebskosten')]
+
+EMISSIONEN = [('em_Gaskessel', 'Gaskessel'),
+              ('em_BHKW', 'BHKW'),
+              ('em_Strombezug', 'Strombezug'),
+              ('em_Waermebezug', 'Waermebezug')]
+
+INVESTITIONEN = [('PV_Invest_kW', 'PV'),
+                 ('Solarthermie_Invest_kW', 'Solarthermie'),
+                 ('Gaskessel_Invest', 'Gaskessel'),
+                 ('BHKW_Invest', 'BHKW'),
+                 ('Waermepumpe_Invest', 'Waermepumpe'),
+                 ('Stromspeicher_Invest', 'Stromspeicher'),
+                 ('Waermespeicher_Invest', 'Waermespeicher')]
+
+DECKUNGSGRADE = [('Verhaeltnis_el', 'Strom'),
+                 ('Verhaeltnis_th', 'Waerme'),
+                 ('Deckungsgrad', 'Gesamt')]
+
+# (Dateiname, Spalten, Faktor, Achsenbeschriftung, gestapelt)
+DIAGRAMME = [('Kosten', KOSTEN, 1e-3, 'Kosten [Tsd. Euro/a]', True),
+             ('CO2-Emissionen', EMISSIONEN, 1e-6, 'CO2-Emissionen [t/a]',
+              True),
+             ('Investitionen', INVESTITIONEN, 1.0,
+              'Investitionsgroesse [kW bzw. kWh]', False),
+             ('Deckungsgrade', DECKUNGSGRADE, 1.0, 'Deckungsgrad [-]', False)]
+
+
+def oeffne_datenbank(file_path=DATENBANK):
+    """Open (and create) the KPI table of the teams. A table with other
+    columns (changed KPI record) is created again."""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    # mehrere Teamprozesse schreiben gleichzeitig
+    con = sqlite3.connect(file_path, timeout=60)
+    spalten = ['team', 'name', 'schluessel', 'zeit'] + KENNZAHLEN
+    vorhanden = [r[1] for r in con.execute('PRAGMA table_info(teams)')]
+    if vorhanden and vorhanden != spalten:
+        con.execute('DROP TABLE teams')
+    con.execute('CREATE TABLE IF NOT EXISTS teams ('
+                'team INTEGER PRIMARY KEY, name TEXT, schluessel TEXT, '
+                'zeit TEXT, {0})'.format(', '.join(
+                    '"{0}" REAL'.format(k) for k in KENNZAHLEN)))
+    con.commit()
+    return con
+
+
+def speichere(team_number, name, kennzahlen, schluessel=None):
+    """Write the KPI record of one team (replaces the previous row)."""
+    werte = dataclasses.asdict(kennzahlen)
+    spalten = ['team', 'name', 'schluessel', 'zeit'] + KENNZAHLEN
+    zeile = [team_number + 1, name, schluessel,
+             time.strftime('%Y-%m-%d %H:%M:%S')]
+    zeile += [None if werte[k] is None else float(werte[k])
+              for k in KENNZAHLEN]
+    con = oeffne_datenbank()
+    try:
+        con.execute('INSERT OR REPLACE INTO teams ({0}) VALUES ({1})'.format(
+            ', '.join('"{0}"'.format(s) for s in spalten),
+            ', '.join('?' * len(spalten))), zeile)
+        con.commit()
+    finally:
+        con.close()
+
+
+def entferne(team_number, file_path=DATENBANK):
+    """Delete the KPI record of one team, so a team that fails in this run
+    is missing in the report instead of showing its previous results."""
+    if not os.path.exists(file_path):
+        return
+    con = sqlite3.connect(file_path, timeout=60)
+    try:
+        con.execute('DELETE FROM teams WHERE team = ?', (team_number + 1,))
+        con.commit()
+    except sqlite3.OperationalError:
+        # noch keine Tabelle
+        pass
+    finally:
+        con.close()
+
+
+def lade(teams=None, file_path=DATENBANK):
+    """Return the KPI records as DataFrame with one row per team (index:
+    team name), optionally only the teams `teams` (numbers from 0)."""
+    con = sqlite3.connect(file_path)
+    try:
+        df = pd.read_sql_query('SELECT * FROM teams ORDER BY team', con)
+    finally:
+        con.close()
+    if teams is not None:
+        df = df[df['team'].isin([n + 1 for n in teams])]
+    return df.set_index('name')
+
+
+def _kennzahlen(zeile):
+    # fehlende Speicherkennzahlen sind NULL in der Datenbank
+    return Kennzahlen(**{k: None if pd.isna(zeile[k]) else zeile[k]
+                         for k in KENNZAHLEN})
+
+
+def vergleichstabelle(df):
+    """Return the values of Auswertungsergebnisse_Text.csv with one column
+    per team."""
+    labels = load_result_labels()
+    werte = {name: _kennzahlen(zeile).tabelle()
+             for name, zeile in df.iterrows()}
+    tabelle = pd.DataFrame(werte, columns=list(df.index))
+    tabelle.index = labels[labels.columns[0]].values
+    return tabelle
+
+
+def bericht(config_path):
+    """Write the comparison tables and charts of the teams of the
+    configuration. Returns the folder of the report."""
+    cfg = load_config(config_path)
+    teams = range(cfg['number_of_teams'])
+    if not os.path.exists(DATENBANK):
+        logging.warning('No KPI of the teams in {0}, no comparison '
+                        'report.'.format(DATENBANK))
+        return None
+    df = lade(teams)
+    fehlend = sorted(set(n + 1 for n in teams) - set(df['team']))
+    if fehlend:
+        logging.warning('No KPI of team(s) {0} in {1}.'.format(
+            ', '.join(str(n) for n in fehlend), DATENBANK))
+    if df.empty:
+        return None
+
+    verzeichnis = os.path.join(abs_path, 'results', 'vergleich')
+    os.makedirs(verzeichnis, exist_ok=True)
+    vergleichstabelle(df).to_csv(
+        os.path.join(verzeichnis, 'Auswertungsergebnisse_Vergleich.csv'),
+        sep=';')
+    df.to_csv(os.path.join(verzeichnis, 'Kennzahlen_Vergleich.csv'), sep=';')
+
+    if cfg.get('plots', True) and plots_available():
+        for name, spalten, faktor, ylabel, gestapelt in DIAGRAMME:
+            daten = df[[k for k, _ in spalten]] * faktor
+            daten.columns = [b for _, b in spalten]
+            zeichne_balken({
+                'df': daten,
+                'titel': '{0} der Teams'.format(name),
+                'ylabel': ylabel,
+                'gestapelt': gestapelt,
+                'dateiname': os.path.join(verzeichnis, '{0}.{1}'.format(
+                    name, cfg.get('plot_format', 'png'))),
+                'dpi': cfg.get('plot_dpi', 150)})
+    logging.info('Comparison report of {0} teams in {1}'.format(
+        len(df), verzeichnis))
+    return verzeichnis
+
+
+def main():
+    config_file_path = os.path.abspath('../experiment_config/config.yaml')
+    logger.define_logging(logfile='vergleich.log')
+
+    cfg = load_config(config_file_path)
+    verzeichnis = bericht(config_file_path)
+    if verzeichnis is None:
+        return
+    print('')
+    print('Teamvergleich ({0})'.format(verzeichnis))
+    print(lade(range(cfg['number_of_teams']))[
+        ['sum_costs', 'em_co2', 'Deckungsgrad']].to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""
+Zeitfenster
+-----------
+
+Extraction of the time series shown in the plots (whole period and
+seasonal weeks) from the `Flussmatrix`. The windows are defined in
+config.yaml either by a date range or as 'auto' (typical week of the given
+months). All windows of a bus are cut from the stacked flow matrix in one
+step, flows without relevant energy in a window are dropped with one masked
+reduction. Works for every time index (hourly, 15 minutes, several years).
+"""
+
+###############################################################################
+# imports
+###############################################################################
+
+import calendar
+import numpy as np
+import pandas as pd
+
+
+# Zeitreihen je Bus: (Kurzname, Vorzeichen, Betrag bilden)
+# positive Werte = Einspeisung in den Bus, negative Werte = Entnahme
+BILANZEN = {
+    'el': [('Strombezug', 1, False),
+           ('PV', 1, False),
+           ('BHKW_el', 1, False),
+           ('Stromspeicher_out', 1, True),
+           ('Strombedarf', -1, False),
+           ('Stromueberschuss', -1, False),
+           ('Waermepumpe_el', -1, False),
+           ('Stromspeicher_in', -1, True)],
+    'th': [('Waermebezug', 1, False),
+           ('Solarthermie', 1, False),
+           ('Gaskessel', 1, False),
+           ('BHKW_th', 1, False),
+           ('Waermepumpe_th', 1, False),
+           ('Waermespeicher_out', 1, True),
+           ('Waermebedarf', -1, False),
+           ('Waermeueberschuss', -1, False),
+           ('Waermespeicher_in', -1, True)],
+}
+
+# Zeitreihen mit weniger Energie im Fenster werden nicht dargestellt
+SCHWELLE = 0.1
+
+
+class Zeitfenster(object):
+    """Window [start, ende) of the time index given as positions."""
+
+    def __init__(self, name, start, ende, zeitindex):
+        self.name = name
+        self.start = start
+        self.ende = ende
+        self.zeitindex = zeitindex[start:ende]
+
+    def __len__(self):
+        return self.ende - self.start
+
+    def titel(self):
+        """Date range of the window for plot titles, e.g.
+        '07.01.-13.01.2019'."""
+        if len(self) == 0:
+            return ''
+        return '{0:%d.%m.}-{1:%d.%m.%Y}'.format(self.zeitindex[0],
+                                                self.zeitindex[-1])
+
+
+def typische_woche(flussmatrix, monate):
+    """Return the position of the first time step of the week (starting on a
+    Monday) within `monate` whose mean flows are closest to the mean flows
+    of all time steps in these months."""
+    zeitindex = flussmatrix.zeitindex
+    in_saison = np.asarray(zeitindex.month.isin(monate))
+    if len(zeitindex) < 2 or not in_saison.any():
+        return None
+
+    # Kandidaten: Montage 0 Uhr, deren ganze Woche in der Saison liegt
+    tage = zeitindex.normalize()
+    starts = np.flatnonzero(in_saison & (zeitindex == tage)
+                            & (zeitindex.dayofweek == 0))
+    wochenende = zeitindex[starts] + pd.Timedelta(days=7)
+    enden = zeitindex.searchsorted(wochenende)
+    # ganze Woche im Zeitindex, auch wenn sie mit dem letzten Zeitschritt
+    # endet (dann ist enden == len(zeitindex))
+    schritt = zeitindex[1] - zeitindex[0]
+    saison_kumuliert = np.concatenate([[0], np.cumsum(in_saison)])
+    passend = ((zeitindex[enden - 1] + schritt >= wochenende)
+               & (saison_kumuliert[enden] - saison_kumuliert[starts]
+                  == enden - starts))
+    starts, enden = starts[passend], enden[passend]
+    if len(starts) == 0:
+        return None
+
+    # Mittelwerte aller Wochen ueber kumulierte Summen (ohne Schleife)
+    werte = flussmatrix.werte
+    kumuliert = np.concatenate([np.zeros((werte.shape[0], 1)),
+                                np.cumsum(werte, axis=1)], axis=1)
+    wochen = (kumuliert[:, enden] - kumuliert[:, starts]) / (enden - starts)
+    saison = werte[:, in_saison].mean(axis=1)
+    relevant = saison > 0
+    abweichung = ((wochen[relevant] - saison[relevant, None])
+                  / saison[relevant, None]) ** 2
+    return starts[np.argmin(abweichung.sum(axis=0))]
+
+
+def fenster_aus_config(cfg, flussmatrix):
+    """Return the windows to be plotted: the whole period (name None) and
+    the windows of cfg['seasonal_windows']."""
+    zeitindex = flussmatrix.zeitindex
+    fenster = [Zeitfenster(None, 0, len(zeitindex), zeitindex)]
+    for name, definition in (cfg.get('seasonal_windows') or {}).items():
+        if 'auto' in definition:
+            start = typische_woche(flussmatrix, definition['auto'])
+            if start is None:
+                continue
+            ende = zeitindex.searchsorted(
+                zeitindex[start] + pd.Timedelta(days=7))
+        else:
+            # Enddatum einschliesslich
+            start = zeitindex.searchsorted(pd.Timestamp(definition['start']))
+            ende = zeitindex.searchsorted(
+                pd.Timestamp(definition['end']) + pd.Timedelta(days=1))
+        fenster.append(Zeitfenster(name, int(start), int(ende), zeitindex))
+    return fenster
+
+
+def schneide_fenster(flussmatrix, bus, fenster):
+    """Cut all `fenster` of one bus ('el' or 'th') from the flow matrix.
+
+    Returns a list of DataFrames (one per window) with the flows of the bus
+    with signs, without flows below `SCHWELLE` and with the columns sorted
+    by their absolute energy.
+    """
+    namen = [n for n, _, _ in BILANZEN[bus]]
+    vorzeichen = np.array([v for _, v, _ in BILANZEN[bus]], dtype=float)
+    betrag = np.array([b for _, _, b in BILANZEN[bus]])
+
+    # Alle Fenster in einem Schritt ausschneiden
+    fenster = [f for f in fenster if len(f) > 0]
+    if not fenster:
+        return []
+    spalten = np.concatenate([np.arange(f.start, f.ende) for f in fenster])
+    grenzen = np.cumsum([0] + [len(f) for f in fenster])
+    roh = flussmatrix.werte[flussmatrix.zeilen(namen)][:, spalten]
+
+    # Energie je Fluss und Fenster in einer Reduktion
+    summen = np.add.reduceat(roh, grenzen[:-1], axis=1)
+    sichtbar = summen > SCHWELLE
+
+    werte = np.where(betrag[:, None], np.abs(roh), roh) * vorzeichen[:, None]
+    betragssummen = np.add.reduceat(np.abs(werte), grenzen[:-1], axis=1)
+
+    zeitreihen = []
+    for j, f in enumerate(fenster):
+        auswahl = np.flatnonzero(sichtbar[:, j])
+        reihenfolge = pd.Series(betragssummen[auswahl, j],
+                                index=[namen[i] for i in auswahl])
+        reihenfolge = reihenfolge.sort_values(ascending=False).index
+        df = pd.DataFrame(werte[auswahl, grenzen[j]:grenzen[j + 1]].T,
+                          index=f.zeitindex,
+                          columns=[namen[i] for i in auswahl])
+        zeitreihen.append((f, df[reihenfolge]))
+    return zeitreihen
+
+
+def achsenbeschriftung(zeitindex):
+    """Return tick positions and labels for a plot over `zeitindex`: day
+    names for periods up to two weeks, otherwise month names (with year for
+    periods of more than one year)."""
+    if len(zeitindex) == 0:
+        return [], []
+    if zeitindex[-1] - zeitindex[0] <= pd.Timedelta(days=14):
+        tage = zeitindex.normalize()
+        positionen = np.flatnonzero(np.r_[True, tage[1:] != tage[:-1]])
+        labels = [calendar.day_name[zeitindex[p].dayofweek]
+                  for p in positionen]
+    else:
+        monate = zeitindex.year * 12 + zeitindex.month
+        positionen = np.flatnonzero(np.r_[True, monate[1:] != monate[:-1]])
+        mehrjaehrig = zeitindex[0].year != zeitindex[-1].year
+        labels = [calendar.month_name[zeitindex[p].month]
+                  + (' {0}'.format(zeitindex[p].year) if mehrjaehrig else '')
+                  for p in positionen]
+    return positionen, labels
@@ -6,9 +6,149 @@ Created on Wed Sep  9 15:15:33 2020
 """
 
 import os
-from Lehrbeispiel import run_model
+import sys
+import time
+import logging
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from oemof.tools import logger
+from Lehrbeispiel import run_model, wait_for_dumps
 from Lehrbeispiel_Auswertung import display_results
-import yaml
+from Lehrbeispiel_Daten import abs_path, load_config
+import Lehrbeispiel_Profil as profil
+import Lehrbeispiel_Vergleich as vergleich
+import pandas as pd
+
+
+def _profile_path(team_number):
+    return os.path.join(abs_path, 'results',
+                        'profile_team_{0}.jsonl'.format(team_number+1))
+
+
+class _LogStream(object):
+    """File-like object that forwards print() output to the logging module,
+    so that the console output of a team ends up in the team's log file."""
+
+    def __init__(self, level=logging.INFO):
+        self.level = level
+
+    def write(self, text):
+        text = text.rstrip()
+        if text:
+            logging.log(self.level, text)
+
+    def flush(self):
+        pass
+
+
+def run_team(config_path, team_number, parallel=False):
+    """Build, solve and postprocess the energy system of one team.
+
+    Errors are caught and returned as part of the status dictionary, so that
+    a failing team does not stop the other teams of the batch.
+    """
+    cfg = load_config(config_path)
+
+    # Eigene Logdatei je Team, im Parallelbetrieb nur Warnungen am Bildschirm
+    logfile = logger.define_logging(
+        logfile='model_team_{0}.log'.format(team_number+1),
+        screen_level=logging.WARNING if parallel else logging.INFO,
+        file_level=logging.DEBUG)
+
+    status = {'Team': team_number+1,
+              'Name': cfg['team_names'][team_number],
+              'Status': 'ok',
+              'Dauer [s]': 0.0,
+              'Fehler': '',
+              'Logdatei': logfile}
+    start = time.time()
+    stdout = sys.stdout
+    if parallel:
+        sys.stdout = _LogStream()
+    try:
+        if cfg['display_results'] and cfg.get('comparison_report', True):
+            # alte Kennzahlen des Teams nicht als aktuell berichten
+            vergleich.entferne(team_number)
+        results = None
+        if cfg['run_model']:
+            results = run_model(config_path=config_path,
+                                team_number=team_number)
+            if not cfg.get('in_memory_results', True):
+                # Auswertung liest die gespeicherte .oemof-Datei
+                wait_for_dumps()
+                results = None
+        if cfg['display_results']:
+            display_results(config_path=config_path, team_number=team_number,
+                            results=results)
+    except Exception as e:
+        logging.error(traceback.format_exc())
+        status['Status'] = 'Fehler'
+        status['Fehler'] = '{0}: {1}'.format(type(e).__name__, e)
+    finally:
+        wait_for_dumps()
+        sys.stdout = stdout
+        # Laufzeiten der Phasen von run_model (inkl. dump) speichern
+        profil.beende(_profile_path(team_number)
+                      if cfg.get('profiling', False) else None)
+    status['Dauer [s]'] = round(time.time() - start, 1)
+    return status
+
+
+def print_summary(status_list):
+    """Print a summary table with one line per team."""
+    summary = pd.DataFrame(status_list).sort_values('Team')
+    print('')
+    print('Zusammenfassung')
+    print(summary.to_string(index=False))
+
+
+def print_profile(cfg):
+    """Print the duration of the phases of run_model per team (only with
+    profiling in config.yaml)."""
+    if not cfg.get('profiling', False):
+        return
+    tabelle = profil.zusammenfassung(
+        profil.lade([_profile_path(n)
+                     for n in range(cfg['number_of_teams'])]))
+    if tabelle.empty:
+        return
+    print('')
+    print('Laufzeiten je Phase [s] und Team')
+    print(tabelle.to_string())
+
+
+def run_teams(config_file_path):
+    """Run all teams of the configuration and return their status list."""
+    cfg = load_config(config_file_path)
+
+    teams = range(cfg['number_of_teams'])
+    number_of_workers = min(cfg.get('number_of_workers', 1), len(teams))
+
+    status_list = []
+    if number_of_workers > 1:
+        # Jedes Team (Aufbau, Optimierung, Auswertung) in einem eigenen Prozess
+        with ProcessPoolExecutor(max_workers=number_of_workers) as pool:
+            futures = {pool.submit(run_team, config_file_path, n, True): n
+                       for n in teams}
+            for future in as_completed(futures):
+                n = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    # z.B. abgestuerzter Worker-Prozess
+                    status = {'Team': n+1,
+                              'Name': cfg['team_names'][n],
+                              'Status': 'Fehler',
+                              'Dauer [s]': float('nan'),
+                              'Fehler': '{0}: {1}'.format(type(e).__name__, e),
+                              'Logdatei': ''}
+                print('Team {0} ({1}) beendet: {2}'.format(
+                    status['Team'], status['Name'], status['Status']))
+                status_list.append(status)
+    else:
+        for n in teams:
+            status_list.append(run_team(config_file_path, n))
+    return status_list
 
 
 def main():
@@ -16,19 +156,15 @@ def main():
     exp_cfg_file_name = 'config.yaml'
     config_file_path = os.path.abspath(
         '../experiment_config/' + exp_cfg_file_name)
-    with open(config_file_path, 'r') as ymlfile:
-        cfg = yaml.load(ymlfile, Loader=yaml.CLoader)
-
-    # global teamdata
-    if cfg['run_model']:
-        for n in range(cfg['number_of_teams']):
-            run_model(config_path=config_file_path, team_number=n)
+    cfg = load_config(config_file_path)
 
-    # Basic analysis
-    if cfg['display_results']:
-        for n in range(cfg['number_of_teams']):
-                display_results(config_path=config_file_path, team_number=n)
+    status_list = run_teams(config_file_path)
 
+    print_summary(status_list)
+    if cfg['display_results'] and cfg.get('comparison_report', True):
+        vergleich.bericht(config_file_path)
+    print_profile(cfg)
 
 
-main()
+if __name__ == '__main__':
+    main()
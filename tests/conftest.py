@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+# Die Module liegen flach in src und werden ueber ihren Namen importiert
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..', 'src'))
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import Lehrbeispiel_Ablage as ablage
+from Lehrbeispiel_Ergebnisse import BUSSE, FLUESSE, SPEICHER, Flussmatrix
+
+
+@pytest.fixture(autouse=True)
+def ablage_verzeichnis(tmp_path, monkeypatch):
+    monkeypatch.setattr(ablage, 'abs_path', str(tmp_path))
+
+
+def _results(zeitindex):
+    zufall = np.random.RandomState(0)
+    n = len(zeitindex)
+    flussmatrix = Flussmatrix(
+        [name for name, _ in FLUESSE], zufall.rand(len(FLUESSE), n) * 100,
+        zeitindex, {'PV': 12.5, 'Gaskessel': 80.0, 'Stromspeicher': 0.0},
+        {s: zufall.rand(n) for s in SPEICHER})
+    return {'flussmatrix': flussmatrix,
+            'schattenpreise': {b: zufall.rand(n) for b in BUSSE},
+            'meta': {'objective': 1234.5, 'name': 'Model'},
+            'schluessel': 'abc'}
+
+
+@pytest.mark.parametrize('zeitindex', [
+    pd.date_range('2019-01-01', periods=48, freq='H'),
+    pd.date_range('2019-01-01', periods=48, freq='15min'),
+    pd.DatetimeIndex(['2019-01-01 00:00', '2019-01-01 01:00',
+                      '2019-01-01 03:00'])])
+def test_speichern_und_laden(zeitindex):
+    results = _results(zeitindex)
+    original = results['flussmatrix']
+    ablage.speichere(results, 0)
+    assert ablage.vorhanden(0)
+    assert not ablage.vorhanden(1)
+
+    geladen = ablage.lade(0)
+    assert isinstance(geladen.werte, np.memmap)
+    assert geladen.namen == original.namen
+    assert np.array_equal(geladen.werte, original.werte)
+    assert geladen.zeitindex.equals(zeitindex)
+    assert geladen.investitionen == original.investitionen
+    for name in SPEICHER:
+        assert np.array_equal(geladen.speicherstand[name],
+                              original.speicherstand[name])
+    for bus in BUSSE:
+        assert np.array_equal(geladen.schattenpreise[bus],
+                              results['schattenpreise'][bus])
+
+    kopf = ablage.lade_kopf(0)
+    assert kopf['meta'] == results['meta']
+    assert kopf['schluessel'] == 'abc'
+
+    fluss = ablage.lade_fluss(0, 'PV')
+    assert np.array_equal(fluss.values, original['PV'])
+    assert fluss.index.equals(zeitindex)
+    preise = ablage.lade_schattenpreise(0)
+    assert list(preise.columns) == BUSSE
+    assert np.array_equal(preise['Strom'].values,
+                          results['schattenpreise']['Strom'])
+
+
+def test_ohne_schattenpreise():
+    results = _results(pd.date_range('2019-01-01', periods=4, freq='H'))
+    del results['schattenpreise']
+    ablage.speichere(results, 0)
+    assert ablage.lade(0).schattenpreise == {}
+    assert ablage.lade_schattenpreise(0).empty
+
+
+def test_unbekanntes_format(monkeypatch):
+    ablage.speichere(_results(pd.date_range('2019-01-01', periods=4,
+                                            freq='H')), 0)
+    monkeypatch.setattr(ablage, 'FORMAT', ablage.FORMAT + 1)
+    with pytest.raises(ValueError):
+        ablage.lade(0)
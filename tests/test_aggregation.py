@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from Lehrbeispiel_Aggregation import MERKMALE, typische_perioden
+
+
+def _zeitreihen(tage=10, n=24):
+    """Time series with the peaks of P* and Q* on different days."""
+    rng = np.random.default_rng(0)
+    data = {name: rng.random(tage * n) for name in MERKMALE}
+    data['P*'][2 * n + 5] = 2.0
+    data['Q*'][7 * n + 5] = 2.0
+    return data
+
+
+def test_anzahl_der_typischen_perioden():
+    cfg = {'typical_periods': 4, 'time_steps_per_period': 24,
+           'peak_periods': True}
+    aggregation = typische_perioden(_zeitreihen(), 240, cfg)
+    assert len(aggregation.perioden) == 4
+    assert {2, 7} <= set(aggregation.perioden)
+
+
+@pytest.mark.parametrize('anzahl', [1, 2])
+def test_nicht_mehr_spitzenperioden_als_typische_perioden(anzahl):
+    cfg = {'typical_periods': anzahl, 'time_steps_per_period': 24,
+           'peak_periods': True}
+    with pytest.raises(ValueError, match='peak periods'):
+        typische_perioden(_zeitreihen(), 240, cfg)
+
+
+def test_ohne_spitzenperioden():
+    cfg = {'typical_periods': 2, 'time_steps_per_period': 24,
+           'peak_periods': False}
+    assert len(typische_perioden(_zeitreihen(), 240, cfg).perioden) == 2
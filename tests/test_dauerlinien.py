@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Lehrbeispiel_Dauerlinien import berechne
+from Lehrbeispiel_Ergebnisse import FLUESSE, Flussmatrix
+
+
+def _flussmatrix(zeitindex, investitionen):
+    werte = np.zeros((len(FLUESSE), len(zeitindex)))
+    return Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex,
+                       investitionen)
+
+
+def test_viertelstunden():
+    # zwei Tage in Viertelstunden ab 6 Uhr
+    zeitindex = pd.date_range('2019-01-01 06:00', periods=192, freq='15min')
+    flussmatrix = _flussmatrix(zeitindex, {'Gaskessel': 20.0})
+    flussmatrix['Gaskessel'][:] = 10.0
+    flussmatrix['Strombedarf'][:] = np.tile([1.0, 2.0, 3.0, 4.0], 48)
+
+    analyse = berechne(flussmatrix)
+    namen = analyse.namen
+
+    # Heatmaps: drei Kalendertage mit je 96 Viertelstunden
+    assert analyse.heatmaps.shape == (len(namen), 3, 96)
+    assert list(analyse.tage) == list(pd.date_range('2019-01-01', periods=3,
+                                                    freq='D'))
+    gaskessel = analyse.heatmaps[namen.index('Gaskessel')]
+    assert np.isnan(gaskessel[0, :24]).all()
+    assert (gaskessel[0, 24:] == 10.0).all()
+    assert (gaskessel[1] == 10.0).all()
+    assert (gaskessel[2, :24] == 10.0).all()
+    assert np.isnan(gaskessel[2, 24:]).all()
+
+    # Vollbenutzungsstunden: 48 h mit halber Leistung bzw. mittlere Last
+    # 2.5 von 4 kW
+    stunden = analyse.vollbenutzungsstunden_df()['Vollbenutzungsstunden [h]']
+    assert stunden['Gaskessel'] == pytest.approx(24.0)
+    assert stunden['Strombedarf'] == pytest.approx(48 * 2.5 / 4)
+    assert stunden['BHKW'] == 0.0
+
+    assert analyse.dauerlinien.shape == (len(namen), 192)
+    assert analyse.dauerlinien[namen.index('Strombedarf'), 0] == 4.0
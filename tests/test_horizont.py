@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Lehrbeispiel import create_model
+from Lehrbeispiel_Daten import (abs_path, load_config, load_parameters,
+                                load_time_series)
+from Lehrbeispiel_Horizont import SPEICHER, fenster, rollierender_horizont
+from Lehrbeispiel_Modell import investitionsgroessen
+from Lehrbeispiel_Solver import solve
+
+
+def test_fenster_grenzen():
+    assert fenster(72, 24, 6) == [(0, 24, 30), (24, 48, 54), (48, 72, 72)]
+
+
+def test_kurzes_letztes_fenster():
+    grenzen = fenster(60, 24, 6)
+    assert grenzen == [(0, 24, 30), (24, 48, 54), (48, 60, 60)]
+    # die Kernbereiche decken jeden Zeitschritt genau einmal ab
+    kerne = np.concatenate([np.arange(s, k) for s, k, _ in grenzen])
+    assert np.array_equal(kerne, np.arange(60))
+
+
+def test_ein_fenster():
+    assert fenster(10, 24, 6) == [(0, 10, 10)]
+
+
+@pytest.mark.skipif(shutil.which('cbc') is None, reason='cbc not installed')
+def test_rollierender_horizont():
+    cfg = dict(load_config(os.path.join(abs_path, 'experiment_config',
+                                        'config.yaml')),
+               solver='cbc', solver_interface='file', horizon_window=24,
+               horizon_overlap=6, horizon_workers=1)
+    param_value = load_parameters(cfg, 0)
+    date_time_index = pd.date_range('1/1/2019', periods=60, freq='H')
+    data = {k: np.asarray(v)[:60] for k, v in load_time_series(cfg).items()}
+
+    # Investitionen aus dem Gesamtmodell, Speicher fest vorgegeben
+    _, model = create_model(param_value, data, date_time_index)
+    solve(model, cfg)
+    groessen = dict(investitionsgroessen(model), Stromspeicher=50.0,
+                    Waermespeicher=200.0)
+
+    ergebnisse = rollierender_horizont(create_model, cfg, param_value, data,
+                                       date_time_index, groessen)
+    for werte in ergebnisse.values():
+        assert len(werte['sequences']) == len(date_time_index)
+        assert werte['sequences'].index.equals(date_time_index)
+
+    for speicher in SPEICHER:
+        inhalt = ergebnisse[(speicher, 'None')]['sequences'][
+            'storage_content']
+        assert inhalt.iloc[-1] == pytest.approx(
+            param_value['isl_' + speicher] * groessen[speicher])
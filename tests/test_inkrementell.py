@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+
+import pytest
+import yaml
+
+import Lehrbeispiel
+import Lehrbeispiel_Ablage
+from Lehrbeispiel import run_model, wait_for_dumps
+from Lehrbeispiel_Daten import (abs_path, apply_overrides, load_config,
+                                load_parameters)
+from Lehrbeispiel_Inkrementell import modell_schluessel
+
+
+CONFIG = os.path.join(abs_path, 'experiment_config', 'config.yaml')
+
+
+def test_schluessel():
+    cfg = load_config(CONFIG)
+    param_value = load_parameters(cfg, 0)
+    schluessel = modell_schluessel(cfg, param_value)
+
+    assert modell_schluessel(dict(cfg), param_value.copy()) == schluessel
+    # geaenderter Parameter oder Modelleinstellung: neuer Schluessel
+    assert modell_schluessel(cfg, apply_overrides(
+        param_value, {'vc_el': param_value['vc_el'] + 0.01})) != schluessel
+    assert modell_schluessel(dict(cfg, number_of_time_steps=24),
+                             param_value) != schluessel
+    # Einstellungen der Auswertung: gleicher Schluessel
+    assert modell_schluessel(dict(cfg, plots=not cfg['plots']),
+                             param_value) == schluessel
+
+
+@pytest.mark.skipif(shutil.which('cbc') is None, reason='cbc not installed')
+def test_unveraendertes_team_uebersprungen(tmp_path, monkeypatch):
+    # Ergebnisablage im temporaeren Verzeichnis
+    monkeypatch.setattr(Lehrbeispiel_Ablage, 'abs_path', str(tmp_path))
+    geloest = []
+    loese = Lehrbeispiel.solve
+
+    def solve(model, cfg, aenderungen=None):
+        geloest.append(len(model.TIMESTEPS))
+        return loese(model, cfg, aenderungen)
+    monkeypatch.setattr(Lehrbeispiel, 'solve', solve)
+
+    def konfiguration(**einstellungen):
+        cfg = dict(load_config(CONFIG), number_of_time_steps=24,
+                   dump_results=True, results_format='store',
+                   incremental=True, profiling=False, reuse_model=False,
+                   rolling_horizon=False, typical_periods=0, solver='cbc',
+                   solver_interface='file')
+        cfg.update(einstellungen)
+        file_path = str(tmp_path / 'config.yaml')
+        with open(file_path, 'w') as f:
+            yaml.safe_dump(cfg, f)
+        return file_path
+
+    config_path = konfiguration()
+    erste = run_model(config_path, 0)
+    wait_for_dumps()
+    assert geloest == [24]
+    assert erste['schluessel'] is not None
+
+    # unveraenderte Eingaben: gespeicherte Ergebnisse
+    zweite = run_model(config_path, 0)
+    assert geloest == [24]
+    assert zweite['schluessel'] == erste['schluessel']
+    assert zweite['meta']['objective'] == pytest.approx(
+        erste['meta']['objective'])
+
+    # geaenderte Modelleinstellung: neu geloest
+    dritte = run_model(konfiguration(number_of_time_steps=12), 0)
+    wait_for_dumps()
+    assert geloest == [24, 12]
+    assert dritte['schluessel'] != erste['schluessel']
+
+    # ohne incremental kein Schluessel
+    vierte = run_model(konfiguration(incremental=False), 0)
+    wait_for_dumps()
+    assert geloest == [24, 12, 24]
+    assert vierte['schluessel'] is None
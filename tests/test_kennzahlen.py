@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Lehrbeispiel_Daten import load_parameters
+from Lehrbeispiel_Ergebnisse import FLUESSE, INVESTITIONEN, Flussmatrix
+from Lehrbeispiel_Kennzahlen import berechne_kennzahlen
+
+
+def _flussmatrix(leistung, freq):
+    """Flow matrix with the constant power `leistung` [kW] per flow over
+    one day."""
+    zeitindex = pd.date_range('1/1/2019', '1/1/2019 23:59', freq=freq)
+    werte = np.outer(leistung, np.ones(len(zeitindex)))
+    investitionen = {n: 0.0 for n, _ in INVESTITIONEN}
+    investitionen['Gaskessel'] = 100.0
+    return Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex,
+                       investitionen)
+
+
+def test_energien_unabhaengig_von_der_schrittweite():
+    param_value = load_parameters(
+        {'design_parameters_file_name': ['parameters_Team_01.csv']}, 0)
+    leistung = np.arange(1, len(FLUESSE) + 1, dtype=float)
+    stuendlich = berechne_kennzahlen(_flussmatrix(leistung, 'H'),
+                                     param_value)
+    viertel = berechne_kennzahlen(_flussmatrix(leistung, '15min'),
+                                  param_value)
+
+    # 24 h konstante Leistung: Energie = Leistung * 24 h
+    zeile = dict(zip([n for n, _ in FLUESSE], leistung))
+    assert stuendlich.Strombedarf == pytest.approx(zeile['Strombedarf'] * 24)
+    for feld in ['Strombedarf', 'Strombezug', 'Waermebezug', 'em_co2',
+                 'vc_Erdgas', 'var_costs_es', 'sum_costs', 'Deckungsgrad']:
+        assert getattr(viertel, feld) == pytest.approx(
+            getattr(stuendlich, feld)), feld
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import oemof.solph as solph
+import pytest
+
+from Lehrbeispiel_Daten import (abs_path, apply_overrides, load_config,
+                                load_parameters, load_time_series)
+from Lehrbeispiel_Komponenten import baue, lade_vorlage
+from Lehrbeispiel_Technologien import periodische_kosten, tabelle
+
+
+SCHRITTE = 48
+
+
+def _bisher(energysystem, param_value, data):
+    """Energy system as built in create_model before the component
+    template."""
+    epc = periodische_kosten(param_value)
+    b_gas = solph.Bus(label='Erdgas')
+    b_el = solph.Bus(label='Strom')
+    b_th = solph.Bus(label='Waerme')
+    energysystem.add(b_gas, b_el, b_th)
+    energysystem.add(solph.Sink(label='excess_bel',
+                                inputs={b_el: solph.Flow()}))
+    energysystem.add(solph.Sink(label='excess_bth',
+                                inputs={b_th: solph.Flow()}))
+    energysystem.add(solph.Source(label='Gasnetz', outputs={b_gas: solph.Flow(
+        variable_costs=param_value['vc_gas'] + param_value['vc_CO2'])}))
+    energysystem.add(solph.Source(label='Strombezug', outputs={
+        b_el: solph.Flow(variable_costs=param_value['vc_el'])}))
+    energysystem.add(solph.Source(label='Waermebezug', outputs={
+        b_th: solph.Flow(variable_costs=param_value['vc_th'])}))
+    if param_value['A_Kollektor_gesamt'] > 0:
+        energysystem.add(solph.Source(label='PV', outputs={b_el: solph.Flow(
+            fix=(data['Sol_irradiation [Wh/sqm]'] * 0.001
+                 * param_value['cf_PV']),
+            investment=solph.Investment(
+                ep_costs=epc['PV'],
+                minimum=param_value['A_min_PV'] * 1 * param_value['cf_PV']))}))
+        energysystem.add(solph.Source(label='Solarthermie', outputs={
+            b_th: solph.Flow(
+                fix=(data['Sol_irradiation [Wh/sqm]'] * 0.001
+                     * param_value['cf_Sol']),
+                investment=solph.Investment(
+                    ep_costs=epc['Solarthermie'],
+                    minimum=(param_value['A_min_Sol'] * 1
+                             * param_value['cf_Sol'])))}))
+    energysystem.add(solph.Sink(label='Strombedarf', inputs={
+        b_el: solph.Flow(fix=data['P*'], nominal_value=param_value['W_el'])}))
+    energysystem.add(solph.Sink(label='Waermebedarf', inputs={
+        b_th: solph.Flow(fix=data['Q*'], nominal_value=param_value['W_th'])}))
+    if param_value['max_Gaskessel'] > 0:
+        energysystem.add(solph.Transformer(
+            label='Gaskessel', inputs={b_gas: solph.Flow()},
+            outputs={b_th: solph.Flow(investment=solph.Investment(
+                ep_costs=epc['Gaskessel'],
+                minimum=param_value['min_Gaskessel'],
+                maximum=param_value['max_Gaskessel']))},
+            conversion_factors={b_th: param_value['cf_Gaskessel']}))
+    if param_value['max_BHKW'] > 0:
+        energysystem.add(solph.Transformer(
+            label='BHKW', inputs={b_gas: solph.Flow()},
+            outputs={b_el: solph.Flow(),
+                     b_th: solph.Flow(investment=solph.Investment(
+                         ep_costs=epc['BHKW'],
+                         minimum=param_value['min_BHKW'],
+                         maximum=param_value['max_BHKW']))},
+            conversion_factors={b_el: param_value['cf_BHKW_el'],
+                                b_th: 0.85 - param_value['cf_BHKW_el']}))
+    if param_value['max_Waermepumpe'] > 0:
+        energysystem.add(solph.Transformer(
+            label='Waermepumpe', inputs={b_el: solph.Flow()},
+            outputs={b_th: solph.Flow(investment=solph.Investment(
+                ep_costs=epc['Waermepumpe'],
+                minimum=param_value['min_Waermepumpe'],
+                maximum=param_value['max_Waermepumpe']))},
+            conversion_factors={b_th: param_value['COP_Waermepumpe']}))
+    for name, bus in [('Stromspeicher', b_el), ('Waermespeicher', b_th)]:
+        if param_value['max_' + name] > 0:
+            energysystem.add(solph.components.GenericStorage(
+                label=name, inputs={bus: solph.Flow()},
+                outputs={bus: solph.Flow()},
+                loss_rate=param_value['lr_' + name],
+                initial_storage_level=param_value['isl_' + name],
+                inflow_conversion_factor=param_value['cf_' + name + '_ein'],
+                outflow_conversion_factor=param_value['cf_' + name + '_aus'],
+                investment=solph.Investment(
+                    ep_costs=epc[name], minimum=param_value['min_' + name],
+                    maximum=param_value['max_' + name])))
+
+
+def _folge(werte):
+    if werte is None or np.isscalar(werte):
+        return werte
+    return [werte[t] for t in range(SCHRITTE)]
+
+
+def _investition(invest):
+    if invest is None:
+        return None
+    return (invest.ep_costs, invest.minimum, invest.maximum)
+
+
+def _fluss(flow):
+    return {'variable_costs': _folge(flow.variable_costs),
+            'nominal_value': flow.nominal_value,
+            'fix': _folge(flow.fix),
+            'investment': _investition(flow.investment)}
+
+
+def _beschreibung(energysystem):
+    """Components of an energy system as comparable dictionary."""
+    ergebnis = {}
+    for node in energysystem.nodes:
+        eintrag = {
+            'klasse': type(node).__name__,
+            'inputs': {str(b): _fluss(f) for b, f in node.inputs.items()},
+            'outputs': {str(b): _fluss(f) for b, f in node.outputs.items()}}
+        if isinstance(node, solph.Transformer):
+            eintrag['conversion_factors'] = {
+                str(b): _folge(f) for b, f in node.conversion_factors.items()}
+        if isinstance(node, solph.components.GenericStorage):
+            for attribut in ['loss_rate', 'inflow_conversion_factor',
+                             'outflow_conversion_factor']:
+                eintrag[attribut] = _folge(getattr(node, attribut))
+            eintrag['initial_storage_level'] = node.initial_storage_level
+            eintrag['investment'] = _investition(node.investment)
+        ergebnis[str(node)] = eintrag
+    return ergebnis
+
+
+def _energiesysteme(overrides):
+    cfg = load_config(os.path.join(abs_path, 'experiment_config',
+                                   'config.yaml'))
+    param_value = apply_overrides(load_parameters(cfg, 0), overrides)
+    data = load_time_series(cfg)
+    vorlage = solph.EnergySystem()
+    baue(vorlage, lade_vorlage(), param_value, data, tabelle(param_value))
+    bisher = solph.EnergySystem()
+    _bisher(bisher, param_value, data)
+    return param_value, vorlage, bisher
+
+
+@pytest.mark.parametrize('overrides', [
+    {},
+    {'max_Stromspeicher': 100, 'max_Waermespeicher': 500,
+     'max_Waermepumpe': 50},
+    {'A_Kollektor_gesamt': 0},
+    {'max_Gaskessel': 0, 'max_BHKW': 0},
+    {'wacc': 0.0}])
+def test_wie_bisherige_komponenten(overrides):
+    _, vorlage, bisher = _energiesysteme(overrides)
+    beschreibung = _beschreibung(vorlage)
+    assert 'Gasnetz' in beschreibung
+    assert beschreibung == _beschreibung(bisher)
+
+
+def test_nicht_gebaute_komponenten():
+    _, vorlage, _ = _energiesysteme({'A_Kollektor_gesamt': 0,
+                                     'max_BHKW': 0})
+    labels = set(str(n) for n in vorlage.nodes)
+    assert not labels & {'PV', 'Solarthermie', 'BHKW'}
+    assert {'Gasnetz', 'Strombedarf', 'Waermebedarf'} <= labels
+
+
+def test_pv_minimum():
+    param_value, vorlage, _ = _energiesysteme({'A_Kollektor_gesamt': 100,
+                                               'A_min_PV': 20})
+    pv = vorlage.groups['PV']
+    invest = next(iter(pv.outputs.values())).investment
+    assert invest.minimum == pytest.approx(20 * param_value['cf_PV'])
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+
+import pytest
+import yaml
+
+import Lehrbeispiel
+from Lehrbeispiel import run_model
+from Lehrbeispiel_Daten import abs_path, apply_overrides, load_parameters
+from Lehrbeispiel_Modell import aktualisiere
+
+
+pytestmark = pytest.mark.skipif(shutil.which('cbc') is None,
+                                reason='cbc not installed')
+
+
+@pytest.fixture
+def config(tmp_path):
+    """Configuration of a short run without stored results."""
+    def schreibe(**einstellungen):
+        with open(os.path.join(abs_path, 'experiment_config',
+                               'config.yaml')) as f:
+            cfg = yaml.safe_load(f)
+        cfg.update({'number_of_time_steps': 48, 'dump_results': False,
+                    'incremental': False, 'profiling': False,
+                    'rolling_horizon': False, 'typical_periods': 0,
+                    'solver': 'cbc', 'solver_interface': 'file'})
+        cfg.update(einstellungen)
+        file_path = str(tmp_path / 'config_{0}.yaml'.format(
+            len(os.listdir(str(tmp_path)))))
+        with open(file_path, 'w') as f:
+            yaml.safe_dump(cfg, f)
+        return file_path
+    Lehrbeispiel._models.clear()
+    yield schreibe
+    Lehrbeispiel._models.clear()
+
+
+def _zielfunktion(config_path, overrides):
+    return run_model(config_path, 0, overrides=overrides)['meta'][
+        'objective']
+
+
+@pytest.mark.parametrize('overrides', [{'vc_el': 0.2},
+                                       {'max_Gaskessel': 150},
+                                       {'W_el': 600000}])
+def test_wiederverwendetes_modell_wie_neu_gebaut(config, overrides):
+    wiederverwenden = config(reuse_model=True)
+    _zielfunktion(wiederverwenden, {'vc_el': 0.4})
+    assert len(Lehrbeispiel._models) == 1
+    wiederverwendet = _zielfunktion(wiederverwenden, overrides)
+    assert len(Lehrbeispiel._models) == 1
+
+    neu = _zielfunktion(config(reuse_model=False), overrides)
+    assert wiederverwendet == pytest.approx(neu, rel=1e-6)
+
+
+def test_nur_geaenderte_werte_uebertragen(config):
+    config_path = config(reuse_model=True)
+    run_model(config_path, 0)
+    _, model, _ = next(iter(Lehrbeispiel._models.values()))
+    with open(config_path) as f:
+        cfg = yaml.safe_load(f)
+    param_value = load_parameters(cfg, 0)
+
+    # unveraenderte Parameter: nichts zu uebertragen
+    aenderungen = aktualisiere(model, param_value)
+    assert aenderungen == {'variablen': [], 'nebenbedingungen': []}
+
+    # nur die Kosten geaendert: Bedarfsprofile bleiben
+    aenderungen = aktualisiere(model, apply_overrides(param_value,
+                                                      {'vc_el': 0.2}))
+    assert aenderungen['variablen'] == []
+
+    # geaenderter Strombedarf: ein Eintrag je Zeitschritt
+    aenderungen = aktualisiere(model, apply_overrides(param_value,
+                                                      {'W_el': 500000}))
+    assert len(aenderungen['variablen']) == len(model.TIMESTEPS)
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import shutil
+
+import numpy as np
+import oemof.solph as solph
+import pandas as pd
+import pytest
+
+from Lehrbeispiel_Ergebnisse import schattenpreise_aus_modell
+
+
+pytestmark = pytest.mark.skipif(shutil.which('cbc') is None,
+                                reason='cbc not installed')
+
+
+def _modell(freq, preis=0.4):
+    """Strom bus with a grid import at `preis` Euro/kWh and a fixed
+    demand."""
+    zeitindex = pd.date_range('1/1/2019', periods=4, freq=freq)
+    es = solph.EnergySystem(timeindex=zeitindex)
+    strom = solph.Bus(label='Strom')
+    es.add(strom,
+           solph.Source(label='Strombezug', outputs={
+               strom: solph.Flow(variable_costs=preis)}),
+           solph.Sink(label='Strombedarf', inputs={
+               strom: solph.Flow(fix=[1, 2, 3, 4], nominal_value=10)}))
+    model = solph.Model(es)
+    del model.dual, model.rc
+    model.receive_duals()
+    model.solve(solver='cbc')
+    return model
+
+
+@pytest.mark.parametrize('freq, stunden', [('H', 1.0), ('15min', 0.25)])
+def test_schattenpreise_in_euro_je_kwh(freq, stunden):
+    model = _modell(freq)
+    gewichte = [model.objective_weighting[t] for t in model.TIMESTEPS]
+    assert np.allclose(gewichte, stunden)
+    preise = schattenpreise_aus_modell(model)
+    assert list(preise) == ['Strom']
+    assert np.allclose(preise['Strom'], 0.4)
+
+
+def test_ohne_dualwerte():
+    zeitindex = pd.date_range('1/1/2019', periods=2, freq='H')
+    es = solph.EnergySystem(timeindex=zeitindex)
+    es.add(solph.Bus(label='Strom'))
+    assert schattenpreise_aus_modell(solph.Model(es)) == {}
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Lehrbeispiel_Ergebnisse import FLUESSE, Flussmatrix
+from Lehrbeispiel_Speicher import rainflow, speicheranalyse, umkehrpunkte
+
+
+# Beispiel der ASTM E1049-85 (Bild 6): Umkehrpunkte A bis I
+ASTM = [-2, 1, -3, 5, -1, 3, -4, 4, -2]
+
+# Spannweite: Anzahl der Zyklen nach ASTM E1049-85 (Bild 6)
+ASTM_ZYKLEN = {3: 0.5, 4: 1.5, 6: 0.5, 8: 1.0, 9: 0.5}
+
+
+def _zyklen(spannweiten, anzahl):
+    zyklen = {}
+    for spannweite, n in zip(spannweiten, anzahl):
+        zyklen[spannweite] = zyklen.get(spannweite, 0.0) + n
+    return zyklen
+
+
+def test_rainflow_astm():
+    spannweiten, anzahl = rainflow(ASTM)
+    assert _zyklen(spannweiten, anzahl) == ASTM_ZYKLEN
+    # Halbzyklen A-B, B-C, C-D, D-G, G-H, H-I und voller Zyklus E-F
+    assert sorted(spannweiten[anzahl == 0.5]) == [3, 4, 6, 8, 8, 9]
+    assert list(spannweiten[anzahl == 1.0]) == [4]
+
+
+def test_umkehrpunkte_astm():
+    # Zwischenwerte und Stillstand zwischen den Umkehrpunkten
+    zeitreihe = []
+    for a, b in zip(ASTM[:-1], ASTM[1:]):
+        zeitreihe.extend(np.linspace(a, b, 5)[:-1])
+        zeitreihe.append(b)
+    zeitreihe.append(ASTM[-1])
+    assert list(umkehrpunkte(zeitreihe)) == ASTM
+    assert _zyklen(*rainflow(umkehrpunkte(zeitreihe))) == ASTM_ZYKLEN
+
+
+def test_umkehrpunkte_toleranz():
+    assert list(umkehrpunkte([0, 1, 1 - 1e-9, 2, 0], 1e-6)) == [0, 2, 0]
+    assert list(umkehrpunkte([3, 3, 3])) == [3, 3]
+
+
+@pytest.mark.parametrize('freq, stunden', [('H', 1.0), ('15min', 0.25)])
+def test_speicheranalyse_schrittweite(freq, stunden):
+    zeitindex = pd.date_range('2019-01-01', periods=4, freq=freq)
+    werte = np.zeros((len(FLUESSE), len(zeitindex)))
+    flussmatrix = Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex,
+                              {'Stromspeicher': 10.0},
+                              {'Stromspeicher': np.full(4, 5.0)})
+    flussmatrix['Stromspeicher_in'][:] = 4.0
+    flussmatrix['Stromspeicher_out'][:] = 4.0
+    param_value = {'cf_Stromspeicher_ein': 1.0, 'cf_Stromspeicher_aus': 1.0,
+                   'isl_Stromspeicher': 0.5}
+
+    kennzahlen = speicheranalyse(flussmatrix, param_value)['Stromspeicher']
+    assert kennzahlen['Eingespeichert [kWh]'] == pytest.approx(16 * stunden)
+    assert kennzahlen['Ausgespeichert [kWh]'] == pytest.approx(16 * stunden)
+    assert kennzahlen['Verluste [kWh]'] == pytest.approx(0.0)
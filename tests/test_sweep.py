@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+
+import pytest
+import yaml
+
+import Lehrbeispiel_Sweep
+from Lehrbeispiel_Daten import abs_path, load_config
+from Lehrbeispiel_Sweep import run_sweep, szenarien
+
+
+CONFIG = os.path.join(abs_path, 'experiment_config', 'config.yaml')
+
+
+@pytest.fixture
+def sweep(tmp_path, monkeypatch):
+    """Small sweep definition, the database is written into tmp_path."""
+    os.makedirs(str(tmp_path / 'results'))
+    monkeypatch.setattr(Lehrbeispiel_Sweep, 'abs_path', str(tmp_path))
+
+    def schreibe(**einstellungen):
+        spec = {'teams': [1],
+                'parameters': {'vc_CO2': {'start': 0.0, 'stop': 0.2,
+                                          'steps': 3},
+                               'capex_Waermepumpe': {'values': [800, 1200]}},
+                'database': 'test.sqlite',
+                'number_of_workers': 1}
+        spec.update(einstellungen)
+        file_path = str(tmp_path / 'sweep.yaml')
+        with open(file_path, 'w') as f:
+            yaml.safe_dump(spec, f)
+        return file_path
+    return schreibe
+
+
+def _zeilen(database):
+    con = sqlite3.connect(database)
+    try:
+        return con.execute('SELECT id, status, fehler FROM szenarien '
+                           'ORDER BY id').fetchall()
+    finally:
+        con.close()
+
+
+def _gerechnet(config_path, szenario):
+    return {'status': 'ok', 'fehler': '', 'dauer': 0.0, 'kennzahlen': {}}
+
+
+def _abgestuerzt(config_path, szenario):
+    # Absturz des Prozesses, nicht nur eine Ausnahme
+    if szenario['parameter']['capex_Waermepumpe'] == 1200:
+        os._exit(1)
+    return _gerechnet(config_path, szenario)
+
+
+def test_szenarien_kreuzprodukt(sweep):
+    spec = load_config(sweep())
+    cfg = load_config(CONFIG)
+    liste = szenarien(spec, cfg)
+
+    assert len(liste) == 6
+    assert len(set(s['id'] for s in liste)) == 6
+    assert all(s['team'] == 1 for s in liste)
+    assert sorted(set(s['parameter']['vc_CO2'] for s in liste)) == \
+        pytest.approx([0.0, 0.1, 0.2])
+    assert set(s['parameter']['capex_Waermepumpe'] for s in liste) == \
+        {800, 1200}
+    # gleiche Eingaben, gleiche ids
+    assert [s['id'] for s in szenarien(spec, cfg)] == \
+        [s['id'] for s in liste]
+
+    # geaenderte Modelleinstellung: neue ids
+    geaendert = dict(cfg, number_of_time_steps=cfg['number_of_time_steps']-1)
+    assert not set(s['id'] for s in szenarien(spec, geaendert)) & \
+        set(s['id'] for s in liste)
+
+
+def test_gespeicherte_szenarien_uebersprungen(sweep, monkeypatch):
+    aufrufe = []
+    fehlschlag = [1200]
+
+    def rechne(config_path, szenario):
+        aufrufe.append(szenario['id'])
+        if szenario['parameter']['capex_Waermepumpe'] in fehlschlag:
+            return {'status': 'Fehler', 'fehler': 'ValueError: test',
+                    'dauer': 0.0, 'kennzahlen': {}}
+        return _gerechnet(config_path, szenario)
+    monkeypatch.setattr(Lehrbeispiel_Sweep, 'rechne_szenario', rechne)
+    sweep_path = sweep()
+
+    database = run_sweep(CONFIG, sweep_path)
+    assert len(aufrufe) == 6
+    assert len(_zeilen(database)) == 6
+
+    # nur die fehlgeschlagenen Szenarien werden wiederholt
+    del aufrufe[:], fehlschlag[:]
+    run_sweep(CONFIG, sweep_path)
+    assert len(aufrufe) == 3
+    assert len(_zeilen(database)) == 6
+    assert all(status == 'ok' for _, status, _ in _zeilen(database))
+
+    # alle gespeichert: nichts zu rechnen
+    del aufrufe[:]
+    run_sweep(CONFIG, sweep_path)
+    assert aufrufe == []
+
+
+def test_abgestuerzter_prozess_gespeichert(sweep, monkeypatch):
+    monkeypatch.setattr(Lehrbeispiel_Sweep, 'rechne_szenario', _abgestuerzt)
+    database = run_sweep(CONFIG, sweep(number_of_workers=2))
+
+    zeilen = _zeilen(database)
+    assert len(zeilen) == 6
+    fehler = [z for z in zeilen if z[1] == 'Fehler']
+    assert fehler
+    assert all(z[2].startswith('BrokenProcessPool') for z in fehler)
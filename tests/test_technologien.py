@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import pytest
+from oemof.tools import economics
+
+from Lehrbeispiel_Daten import abs_path, load_config, load_parameters
+from Lehrbeispiel_Technologien import annuitaet, tabelle
+
+
+@pytest.mark.parametrize('capex, n, wacc', [(1000, 20, 0.05),
+                                            (800, 15, 0.04),
+                                            (1200.5, 1, 0.1),
+                                            (50, 40, 0.001)])
+def test_annuitaet_wie_oemof(capex, n, wacc):
+    assert annuitaet(capex, n, wacc) == pytest.approx(
+        economics.annuity(capex, n, wacc), rel=1e-12)
+
+
+def test_annuitaet_ohne_zins():
+    # oemof teilt bei wacc == 0 durch null, der Grenzwert ist capex / n
+    assert annuitaet(1000, 20, 0.0) == pytest.approx(50.0)
+    assert annuitaet(1000, 20, 0.0) == pytest.approx(
+        economics.annuity(1000, 20, 1e-9), rel=1e-6)
+
+
+def test_annuitaet_elementweise():
+    capex = np.array([1000.0, 800.0, 500.0])
+    n = np.array([20, 15, 10])
+    wacc = np.array([0.05, 0.0, 0.03])
+    erwartet = [economics.annuity(1000.0, 20, 0.05), 800.0 / 15,
+                economics.annuity(500.0, 10, 0.03)]
+    assert annuitaet(capex, n, wacc) == pytest.approx(erwartet, rel=1e-12)
+    # ein Zinssatz fuer alle Technologien
+    assert annuitaet(capex, n, 0.05) == pytest.approx(
+        [economics.annuity(c, k, 0.05) for c, k in zip(capex, n)],
+        rel=1e-12)
+
+
+def test_tabelle_wie_oemof():
+    cfg = load_config(os.path.join(abs_path, 'experiment_config',
+                                   'config.yaml'))
+    param_value = load_parameters(cfg, 0)
+    technik = tabelle(param_value)
+    for name, zeile in technik.iterrows():
+        assert zeile['epc'] == pytest.approx(economics.annuity(
+            zeile['capex'], zeile['n'], zeile['wacc']), rel=1e-12), name
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from Lehrbeispiel_Ergebnisse import FLUESSE, Flussmatrix
+from Lehrbeispiel_Zeitfenster import typische_woche
+
+
+def _flussmatrix(start, ende, freq='H'):
+    zeitindex = pd.date_range(start, ende, freq=freq)
+    werte = np.ones((len(FLUESSE), len(zeitindex)))
+    return Flussmatrix([n for n, _ in FLUESSE], werte, zeitindex, {})
+
+
+@pytest.mark.parametrize('freq', ['H', '15min'])
+def test_woche_endet_mit_dem_letzten_zeitschritt(freq):
+    # Montag 23.12. bis Sonntag 29.12. einschliesslich letzter Stunde
+    letzter = pd.Timestamp('2019-12-30') - pd.tseries.frequencies.to_offset(
+        freq)
+    flussmatrix = _flussmatrix('2019-12-23', letzter, freq)
+    assert typische_woche(flussmatrix, [12]) == 0
+
+
+def test_unvollstaendige_woche_am_ende():
+    flussmatrix = _flussmatrix('2019-12-23', '2019-12-29 22:00')
+    assert typische_woche(flussmatrix, [12]) is None